@@ -0,0 +1,54 @@
+"""
+Platform adapter registry.
+
+Each adapter decodes one platform's webhooks into NormalizedEvents; the
+shared ingest pipeline (app.services.ingest) does everything else. Register
+a new platform here to get POST /webhooks/<name> and batch support.
+"""
+from typing import Dict, List, Optional
+from app.adapters.base import (
+    InvalidSignature,
+    NormalizedEvent,
+    PlatformAdapter,
+    sha256_signature,
+    verify_sha256_signature,
+)
+from app.adapters.github import GitHubAdapter
+from app.adapters.discord import DiscordAdapter
+from app.adapters.slack import SlackAdapter
+
+# Adapters by name (URL path segment and NDJSON platform tag)
+_adapters: Dict[str, PlatformAdapter] = {}
+
+
+def register_adapter(adapter: PlatformAdapter) -> None:
+    """
+    Makes a platform adapter available to the webhook routes.
+
+    Args:
+        adapter: The adapter; replaces any adapter with the same name
+    """
+    _adapters[adapter.name] = adapter
+
+
+def get_adapter(name: str) -> Optional[PlatformAdapter]:
+    """
+    Looks up an adapter by name (case-insensitive).
+
+    Args:
+        name: Platform name, e.g. "github"
+
+    Returns:
+        PlatformAdapter: The adapter, or None if the platform isn't supported
+    """
+    return _adapters.get(str(name).lower())
+
+
+def list_platforms() -> List[str]:
+    """Returns the names of all registered platforms."""
+    return sorted(_adapters)
+
+
+register_adapter(GitHubAdapter())
+register_adapter(DiscordAdapter())
+register_adapter(SlackAdapter())
@@ -0,0 +1,120 @@
+import hmac
+import hashlib
+from typing import Mapping, Optional
+
+
+class InvalidSignature(Exception):
+    """Raised when a request can't be authenticated as coming from the platform."""
+
+
+def sha256_signature(secret: str, body: bytes) -> str:
+    """Returns the "sha256=<hex>" HMAC-SHA256 signature of a request body."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_sha256_signature(secret: Optional[str], body: bytes, signature: str, label: str) -> None:
+    """
+    Checks a "sha256=<hex>" HMAC-SHA256 body signature in constant time.
+
+    Args:
+        secret: Shared webhook secret (requests are refused if it isn't configured)
+        body: Raw request body
+        signature: Signature header value sent with the request
+        label: Name used in error messages (e.g. "GitHub")
+
+    Raises:
+        InvalidSignature: If no secret is configured or the signature doesn't match
+    """
+    if not secret:
+        raise InvalidSignature(f"{label} webhook secret is not configured")
+    if not hmac.compare_digest(sha256_signature(secret, body), signature or ""):
+        raise InvalidSignature(f"Invalid {label} signature")
+
+
+class NormalizedEvent:
+    """
+    A platform event reduced to what the ingest pipeline needs.
+
+    Attributes:
+        platform: Stored platform name (e.g. "GitHub")
+        content: Payload saved as the activity's content
+        dedup_key: Platform-assigned delivery/event ID, used to drop
+                   redelivered events (None disables deduplication)
+        source: Repository, guild or workspace the event came from
+    """
+
+    def __init__(
+        self,
+        platform: str,
+        content: dict,
+        dedup_key: Optional[str] = None,
+        source: Optional[str] = None,
+    ):
+        self.platform = platform
+        self.content = content
+        self.dedup_key = dedup_key
+        self.source = source
+
+
+class PlatformAdapter:
+    """
+    Decodes and normalizes one platform's webhook events.
+
+    Adapters do no I/O: routing, deduplication, persistence and conflict
+    analysis are shared (see app.services.ingest). Subclasses set `name`
+    (the URL path / NDJSON tag) and `platform`, and implement `normalize`.
+    """
+
+    name = ""
+    platform = ""
+
+    # True when `verify` authenticates requests (the event's source is then trusted)
+    requires_signature = False
+
+    # False when events must come straight from the platform: its signature
+    # covers the original request, so a relay can't vouch for them
+    relayable = True
+
+    # True when the platform expects a reply within a few seconds: the event
+    # is acknowledged once stored and conflict analysis runs afterwards
+    defer_analysis = False
+
+    def verify(self, headers: Mapping[str, str], body: bytes) -> None:
+        """
+        Authenticates a raw webhook request (no-op unless the platform signs requests).
+
+        Args:
+            headers: Request headers (lower-case names)
+            body: Raw request body
+
+        Raises:
+            InvalidSignature: If the request isn't from the platform
+        """
+
+    def handshake(self, payload: dict) -> Optional[dict]:
+        """
+        Answers protocol-level requests that aren't events (e.g. URL verification).
+
+        Args:
+            payload: The decoded request body
+
+        Returns:
+            dict: Response to send as-is, or None for regular events
+        """
+        return None
+
+    def normalize(self, payload: dict, headers: Mapping[str, str]) -> Optional[NormalizedEvent]:
+        """
+        Turns a decoded webhook payload into a normalized event.
+
+        Args:
+            payload: The decoded request body
+            headers: Request headers (lower-case names; empty for batched events)
+
+        Returns:
+            NormalizedEvent: The event, or None if it should be ignored
+
+        Raises:
+            ValueError: If the payload is malformed
+        """
+        raise NotImplementedError
@@ -0,0 +1,46 @@
+import os
+from typing import Mapping, Optional
+from dotenv import load_dotenv
+from app.adapters.base import NormalizedEvent, PlatformAdapter, verify_sha256_signature
+
+# Load environment variables
+load_dotenv()
+
+# Secret shared with the bot that relays Discord messages
+DISCORD_RELAY_SECRET: Optional[str] = os.getenv("DISCORD_RELAY_SECRET")
+
+
+class DiscordAdapter(PlatformAdapter):
+    """
+    Discord messages relayed by the bot.
+
+    The bot signs each request body with DISCORD_RELAY_SECRET
+    (X-Signature-256: sha256=<hex HMAC-SHA256>), so the guild an event
+    names can be trusted as its source.
+    """
+
+    name = "discord"
+    platform = "Discord"
+    requires_signature = True
+
+    def __init__(self, relay_secret: Optional[str] = None):
+        self.relay_secret = relay_secret if relay_secret is not None else DISCORD_RELAY_SECRET
+
+    def verify(self, headers: Mapping[str, str], body: bytes) -> None:
+        verify_sha256_signature(
+            self.relay_secret, body, headers.get("x-signature-256", ""), self.platform
+        )
+
+    def normalize(self, payload: dict, headers: Mapping[str, str]) -> Optional[NormalizedEvent]:
+        if not isinstance(payload, dict):
+            raise ValueError("Discord payload must be a JSON object")
+
+        # Message snowflake IDs are unique, so a relayed retry is recognized
+        message_id = payload.get("id")
+        guild_id = payload.get("guild_id")
+        return NormalizedEvent(
+            platform=self.platform,
+            content=payload,
+            dedup_key=str(message_id) if message_id is not None else None,
+            source=str(guild_id) if guild_id is not None else None,
+        )
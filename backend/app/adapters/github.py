@@ -0,0 +1,46 @@
+import os
+from typing import Mapping, Optional
+from dotenv import load_dotenv
+from app.adapters.base import NormalizedEvent, PlatformAdapter, verify_sha256_signature
+
+# Load environment variables
+load_dotenv()
+
+# Secret configured on the repository or organization webhook
+GITHUB_WEBHOOK_SECRET: Optional[str] = os.getenv("GITHUB_WEBHOOK_SECRET")
+
+
+class GitHubAdapter(PlatformAdapter):
+    """
+    GitHub repository webhooks (pushes, pull requests, issues, ...).
+
+    Deliveries are authenticated with the X-Hub-Signature-256 HMAC of the
+    body, so the repository an event names can be trusted as its source.
+    """
+
+    name = "github"
+    platform = "GitHub"
+    requires_signature = True
+
+    def __init__(self, webhook_secret: Optional[str] = None):
+        self.webhook_secret = webhook_secret if webhook_secret is not None else GITHUB_WEBHOOK_SECRET
+
+    def verify(self, headers: Mapping[str, str], body: bytes) -> None:
+        verify_sha256_signature(
+            self.webhook_secret, body, headers.get("x-hub-signature-256", ""), self.platform
+        )
+
+    def normalize(self, payload: dict, headers: Mapping[str, str]) -> Optional[NormalizedEvent]:
+        if not isinstance(payload, dict):
+            raise ValueError("GitHub payload must be a JSON object")
+
+        repository = payload.get("repository")
+        source = repository.get("full_name") if isinstance(repository, dict) else None
+
+        # Every delivery (including redeliveries of the same event) carries this GUID
+        return NormalizedEvent(
+            platform=self.platform,
+            content=payload,
+            dedup_key=headers.get("x-github-delivery"),
+            source=source,
+        )
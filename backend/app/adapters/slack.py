@@ -0,0 +1,85 @@
+import os
+import hmac
+import time
+import hashlib
+from typing import Mapping, Optional
+from dotenv import load_dotenv
+from app.adapters.base import InvalidSignature, NormalizedEvent, PlatformAdapter
+
+# Load environment variables
+load_dotenv()
+
+# Signing secret of the Slack app (Basic Information > App Credentials)
+SLACK_SIGNING_SECRET: Optional[str] = os.getenv("SLACK_SIGNING_SECRET")
+
+# Requests signed longer ago than this are rejected as possible replays (seconds)
+SLACK_MAX_REQUEST_AGE = 300
+
+
+class SlackAdapter(PlatformAdapter):
+    """
+    Slack Events API.
+
+    Requests are authenticated with Slack's v0 HMAC-SHA256 signature, the
+    one-time url_verification challenge is answered, and message events
+    are normalized so their `text` and `user` feed the project digest.
+    Slack retries events not acknowledged within 3 seconds, so analysis
+    runs after the reply.
+    """
+
+    name = "slack"
+    platform = "Slack"
+    requires_signature = True
+    relayable = False
+    defer_analysis = True
+
+    def __init__(self, signing_secret: Optional[str] = None):
+        self.signing_secret = signing_secret if signing_secret is not None else SLACK_SIGNING_SECRET
+
+    def verify(self, headers: Mapping[str, str], body: bytes) -> None:
+        if not self.signing_secret:
+            raise InvalidSignature("SLACK_SIGNING_SECRET is not configured")
+
+        timestamp = headers.get("x-slack-request-timestamp", "")
+        signature = headers.get("x-slack-signature", "")
+        try:
+            age = abs(time.time() - int(timestamp))
+        except ValueError:
+            raise InvalidSignature("Missing or invalid Slack request timestamp")
+        if age > SLACK_MAX_REQUEST_AGE:
+            raise InvalidSignature("Slack request timestamp is too old")
+
+        basestring = b"v0:" + timestamp.encode() + b":" + body
+        expected = "v0=" + hmac.new(
+            self.signing_secret.encode(), basestring, hashlib.sha256
+        ).hexdigest()
+        if not hmac.compare_digest(expected, signature):
+            raise InvalidSignature("Invalid Slack signature")
+
+    def handshake(self, payload: dict) -> Optional[dict]:
+        # Sent once when the Request URL is configured in the Slack app
+        if isinstance(payload, dict) and payload.get("type") == "url_verification":
+            return {"challenge": payload.get("challenge")}
+        return None
+
+    def normalize(self, payload: dict, headers: Mapping[str, str]) -> Optional[NormalizedEvent]:
+        if not isinstance(payload, dict):
+            raise ValueError("Slack payload must be a JSON object")
+        if payload.get("type") != "event_callback":
+            return None
+
+        event = payload.get("event")
+        if not isinstance(event, dict):
+            raise ValueError("Slack event_callback without an 'event' object")
+
+        # Skip bot posts (including our own notifications) to avoid feedback loops
+        if event.get("bot_id") or event.get("subtype") == "bot_message":
+            return None
+
+        # Slack retries deliveries it considers slow; event_id stays the same
+        return NormalizedEvent(
+            platform=self.platform,
+            content={**event, "team_id": payload.get("team_id"), "event_id": payload.get("event_id")},
+            dedup_key=payload.get("event_id"),
+            source=payload.get("team_id"),
+        )
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.auth import get_admin_user
+from app.profiling import list_profiles, get_profile
+
+# Create API Router for administrator tools
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_admin_user)]
+)
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """
+    List stored request profiles, newest first.
+
+    Admin endpoint - requires an authenticated user listed in ADMIN_USER_IDS.
+    Each entry has the request, its duration and the time breakdown across
+    Supabase calls, LLM calls, JSON work, the event loop and app code.
+
+    Returns:
+        dict: 'profiles' (summaries without stack samples)
+    """
+    return {"profiles": await list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile_detail(profile_id: str):
+    """
+    Fetch one stored request profile including its hottest stacks.
+
+    Admin endpoint - requires an authenticated user listed in ADMIN_USER_IDS.
+
+    Args:
+        profile_id: The ID returned in the profiled response's X-Profile-Id header
+
+    Returns:
+        dict: The full profile
+
+    Raises:
+        HTTPException: 404 if the profile doesn't exist or has expired
+    """
+    profile = await get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    return profile
@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from app.auth import get_current_user
+from app.models.alert import AlertReadRequest
+from app.pagination import encode_cursor, decode_cursor
+from app.rate_limit import rate_limit_user, CHEAP_BUCKET
+from app.services.conflict_alerts import (
+    get_user_project_ids,
+    list_conflict_alerts,
+    count_unread_alerts,
+    mark_alerts_read,
+)
+
+# Create API Router for the conflict alerts feed
+router = APIRouter(
+    prefix="/alerts",
+    tags=["alerts"],
+    dependencies=[Depends(rate_limit_user(CHEAP_BUCKET))]
+)
+
+
+def _scoped_project_ids(user_id: str, project_id: Optional[int]) -> list:
+    """
+    Returns the projects the request may read: all of the user's projects,
+    or just `project_id` if given and owned by the user.
+    """
+    project_ids = get_user_project_ids(user_id)
+    if project_id is None:
+        return project_ids
+    if project_id not in project_ids:
+        raise HTTPException(status_code=404, detail="Project not found or unauthorized")
+    return [project_id]
+
+
+@router.get("")
+async def get_alerts(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    unread_only: bool = False,
+    project_id: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Conflict alerts feed for the current user's projects.
+
+    Protected endpoint - requires valid authentication token.
+    Serves persisted Conflict Radar verdicts that flagged a conflict,
+    newest first, with cursor pagination and unread tracking.
+
+    Args:
+        limit: Maximum number of alerts in the page
+        cursor: Opaque cursor from the previous page's `next_cursor`
+        unread_only: Only return alerts not yet marked as read
+        project_id: Restrict the feed to one of the user's projects
+        current_user: Authenticated user object injected by the dependency
+
+    Returns:
+        dict: 'alerts', 'next_cursor' (None on the last page) and 'unread_count'
+
+    Raises:
+        HTTPException: If the cursor is invalid or fetching alerts fails
+    """
+    after_id = decode_cursor(cursor)
+
+    try:
+        project_ids = _scoped_project_ids(current_user.get('id'), project_id)
+
+        # Fetch one extra row to know whether there is a next page
+        alerts = list_conflict_alerts(project_ids, limit + 1, after_id, unread_only)
+        has_more = len(alerts) > limit
+        alerts = alerts[:limit]
+
+        return {
+            "alerts": alerts,
+            "next_cursor": encode_cursor(alerts[-1]["id"]) if has_more else None,
+            "unread_count": count_unread_alerts(project_ids)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching alerts: {str(e)}"
+        )
+
+
+@router.post("/read")
+async def read_alerts(
+    request: AlertReadRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Mark conflict alerts as read.
+
+    Protected endpoint - requires valid authentication token.
+    Only alerts in the user's own projects are affected.
+
+    Args:
+        request: The alerts to mark (explicit IDs and/or an upper ID bound)
+        current_user: Authenticated user object injected by the dependency
+
+    Returns:
+        dict: Number of alerts marked as read
+
+    Raises:
+        HTTPException: If updating the alerts fails
+    """
+    try:
+        project_ids = get_user_project_ids(current_user.get('id'))
+        marked = mark_alerts_read(project_ids, request.alert_ids, request.up_to_id)
+        return {"status": "success", "marked_read": marked}
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error marking alerts as read: {str(e)}"
+        )
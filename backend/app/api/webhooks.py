@@ -1,8 +1,16 @@
 from fastapi import APIRouter, HTTPException, Request
-from app.database import get_supabase_client
-from app.services.conflict_radar import analyze_activity_for_conflicts
-from datetime import datetime
+from app.rate_limit import enforce_source_limit, source_limit_wait, LLM_BUCKET
+from app.adapters import InvalidSignature, get_adapter, list_platforms
+from app.services.ingest import ingest_events
+from dotenv import load_dotenv
+import os
+import math
+import hmac
 import json
+import hashlib
+
+# Load environment variables
+load_dotenv()
 
 # Create API Router for webhooks
 router = APIRouter(
@@ -11,169 +19,285 @@ router = APIRouter(
 )
 
 
-@router.post("/github")
-async def github_webhook(request: Request):
+# Limits for a single batch request
+BATCH_MAX_EVENTS = 500
+BATCH_MAX_LINE_BYTES = 1024 * 1024
+
+# Secret shared with relays posting to /webhooks/batch; they sign the whole
+# body (X-Relay-Signature-256: sha256=<hex HMAC-SHA256>)
+RELAY_WEBHOOK_SECRET = os.getenv("RELAY_WEBHOOK_SECRET")
+
+# Bucket key for relayed events that name no source
+RELAY_SOURCE = "relay"
+
+
+async def _iter_ndjson_lines(request: Request, digest=None):
+    """
+    Yields (line_number, raw_line) from a streamed NDJSON body.
+    
+    Lines are split as chunks arrive, so the body is never held as one
+    buffer; blank lines are skipped but still counted. Every chunk is also
+    fed to `digest` (e.g. an HMAC) when given.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        if digest is not None:
+            digest.update(chunk)
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+        if len(buffer) > BATCH_MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Line {line_number + 1} exceeds {BATCH_MAX_LINE_BYTES} bytes"
+            )
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+def _parse_batch_line(raw_line: bytes):
+    """
+    Decodes one NDJSON line into a normalized event.
+    
+    Returns:
+        NormalizedEvent: The event, or None if the adapter ignores it
+    
+    Raises:
+        ValueError: If the line is not a platform-tagged JSON event
+    """
+    line = json.loads(raw_line)
+    if not isinstance(line, dict):
+        raise ValueError("Each line must be a JSON object")
+    
+    adapter = get_adapter(line.get("platform", ""))
+    if adapter is None:
+        raise ValueError(
+            f"Unknown platform {line.get('platform')!r}; expected one of {list_platforms()}"
+        )
+    if not adapter.relayable:
+        # The platform signs its own requests; a relay can't carry that proof
+        raise ValueError(
+            f"{adapter.platform} events can't be batched; send them to /webhooks/{adapter.name} "
+            "so their signature can be verified"
+        )
+    
+    payload = line.get("payload")
+    if not isinstance(payload, dict):
+        raise ValueError("'payload' must be a JSON object")
+    
+    # Relays have no platform headers; an explicit delivery ID may be given instead
+    event = adapter.normalize(payload, {})
+    if event is not None and line.get("id") is not None:
+        event.dedup_key = str(line["id"])
+    return event
+
+
+def _webhook_response(platform: str, outcome: dict) -> dict:
+    # Single-event response shape (unchanged from the per-platform handlers)
+    if outcome["status"] == "duplicate":
+        return {
+            "status": "duplicate",
+            "message": f"{platform} event already received",
+        }
+    
+    response_data = {
+        "status": "success",
+        "message": f"{platform} webhook received and saved",
+        "activity_id": outcome["activity_id"],
+        "conflict_check": outcome["conflict_check"]
+    }
+    
+    if outcome["conflict_check"] is None:
+        response_data["message"] += "; conflict analysis runs in the background"
+    # If conflict detected, flag it at the top level too
+    elif outcome["conflict_check"].get("has_conflict"):
+        response_data["alert"] = "⚠️ CONFLICT DETECTED - Check conflict_check for details"
+    
+    return response_data
+
+
+def _batch_source(event) -> str:
+    # Relay-authenticated source; events that name none share the relay's bucket
+    return f"{event.platform}:{event.source}" if event.source else RELAY_SOURCE
+
+
+def _relay_digest():
+    if not RELAY_WEBHOOK_SECRET:
+        raise HTTPException(status_code=401, detail="RELAY_WEBHOOK_SECRET is not configured")
+    return hmac.new(RELAY_WEBHOOK_SECRET.encode(), digestmod=hashlib.sha256)
+
+
+@router.post("/batch")
+async def batch_webhook(request: Request):
     """
-    GitHub webhook endpoint to receive events from GitHub.
+    Batched webhook endpoint for relays that buffer platform events.
     
-    This acts as the 'ears' for GitHub activities, capturing all events
-    and storing them in the activities table. It also checks for conflicts
-    with recent activities using AI.
+    Accepts NDJSON: one event per line, shaped as
+    {"platform": "github" | "discord", "payload": {...}, "id": optional
+    delivery ID}. The relay signs the whole body with RELAY_WEBHOOK_SECRET;
+    the signature is checked before anything is stored, and the sources the
+    lines name are then trusted. Slack events are rejected per line: Slack
+    signs its own requests, so they must be sent to /webhooks/slack.
+    
+    The body is parsed incrementally and every valid event goes through the
+    shared ingest pipeline in one pass: a single bulk insert and one
+    Conflict Radar call per project. Each source (repository, guild) draws
+    one token from its own LLM bucket per batch; lines of a source whose
+    quota is used up are reported as errors with 'retry_after'.
     
     Args:
-        request: The incoming request containing the GitHub webhook payload
+        request: The incoming request with an NDJSON body
         
     Returns:
-        dict: Success message with activity ID and conflict detection results
+        dict: Batch counts and a per-line 'results' list (success with the
+              activity ID and conflict check, duplicate, ignored, or error
+              with a reason)
         
     Raises:
-        HTTPException: If saving to database fails
+        HTTPException: 401 if the relay signature is missing or invalid, 413
+                       if the batch is too large, 500 if saving to database fails
     """
-    try:
-        # Get the raw JSON payload from GitHub
-        payload = await request.json()
-        
-        # Get Supabase client
-        supabase = get_supabase_client()
-        
-        # Fetch the first project ID from the database (or use a dummy ID)
-        # TODO: Replace this with actual project_id from webhook payload or context
-        projects_response = supabase.table("projects").select("id").limit(1).execute()
-        if projects_response.data and len(projects_response.data) > 0:
-            project_id = str(projects_response.data[0]["id"])
-        else:
-            project_id = "1"  # Fallback dummy ID if no projects exist
-        
-        # Save the activity to the activities table
-        response = supabase.table("activities").insert({
-            "platform": "GitHub",
-            "content": payload,
-            "project_id": project_id,
-            "created_at": datetime.utcnow().isoformat()
-        }).execute()
-        
-        # Check if data was inserted successfully
-        if response.data:
-            activity_id = response.data[0].get("id")
-            
-            # Create a readable summary of the activity for conflict detection
-            activity_summary = f"GitHub activity: {json.dumps(payload)[:200]}"
-            
-            # Analyze for conflicts using the Conflict Radar
-            conflict_result = await analyze_activity_for_conflicts(
-                new_activity_text=activity_summary,
-                project_id=project_id
-            )
-            
-            # Build the response
-            response_data = {
-                "status": "success",
-                "message": "GitHub webhook received and saved",
-                "activity_id": activity_id,
-                "conflict_check": {
-                    "has_conflict": conflict_result.get("has_conflict", False),
-                    "verdict": conflict_result.get("verdict", "No analysis")
-                }
-            }
-            
-            # If conflict detected, include the warning in the response
-            if conflict_result.get("has_conflict"):
-                response_data["conflict_check"]["warning"] = conflict_result.get("warning", "")
-                response_data["alert"] = "⚠️ CONFLICT DETECTED - Check conflict_check for details"
-            
-            return response_data
-        else:
+    results = []
+    lines = []
+    events = []
+    digest = _relay_digest()
+    
+    # 1. Parse the stream, recording per-line errors instead of failing the batch
+    async for line_number, raw_line in _iter_ndjson_lines(request, digest):
+        if len(events) + len(results) >= BATCH_MAX_EVENTS:
             raise HTTPException(
-                status_code=500,
-                detail="Failed to save GitHub webhook"
+                status_code=413,
+                detail=f"Batch exceeds {BATCH_MAX_EVENTS} events"
             )
-            
+        try:
+            event = _parse_batch_line(raw_line)
+        except ValueError as e:
+            results.append({"line": line_number, "status": "error", "error": str(e)})
+            continue
+        if event is None:
+            results.append({"line": line_number, "status": "ignored"})
+        else:
+            lines.append(line_number)
+            events.append(event)
+    
+    # 2. Nothing is stored unless the relay signed the body
+    signature = request.headers.get("x-relay-signature-256", "")
+    if not hmac.compare_digest("sha256=" + digest.hexdigest(), signature):
+        raise HTTPException(status_code=401, detail="Invalid relay signature")
+    
+    # 3. One token per source, so one busy repository can't throttle the rest
+    waits = {}
+    for event in events:
+        source = _batch_source(event)
+        if source not in waits:
+            waits[source] = await source_limit_wait(LLM_BUCKET, source)
+    admitted_lines, admitted = [], []
+    for line_number, event in zip(lines, events):
+        wait = waits[_batch_source(event)]
+        if wait > 0:
+            results.append({
+                "line": line_number,
+                "status": "error",
+                "error": "Rate limit exceeded for this source. Please retry later.",
+                "retry_after": max(1, math.ceil(wait)),
+            })
+        else:
+            admitted_lines.append(line_number)
+            admitted.append(event)
+    lines, events = admitted_lines, admitted
+    
+    # 4. Everything else is the shared pipeline
+    try:
+        outcomes = await ingest_events(events) if events else []
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error processing GitHub webhook: {str(e)}"
+            detail=f"Error processing webhook batch: {str(e)}"
         )
+    
+    for line_number, outcome in zip(lines, outcomes):
+        results.append({"line": line_number, **outcome})
+    
+    results.sort(key=lambda result: result["line"])
+    return {
+        "status": "success",
+        "received": len(results),
+        "saved": sum(1 for outcome in outcomes if outcome["status"] == "success"),
+        "results": results
+    }
 
 
-@router.post("/discord")
-async def discord_webhook(request: Request):
+# Declared after /batch so that path isn't taken for a platform name
+@router.post("/{platform}")
+async def platform_webhook(platform: str, request: Request):
     """
-    Discord webhook endpoint to receive events from Discord.
+    Webhook endpoint for every registered platform (GitHub, Discord, Slack).
     
-    This acts as the 'ears' for Discord activities, capturing all events
-    and storing them in the activities table. It also checks for conflicts
-    with recent activities using AI.
+    This acts as the 'ears' for platform activities: the platform's adapter
+    authenticates and normalizes the event, then the shared ingest pipeline
+    drops redeliveries, stores the activity and checks it for conflicts
+    with the current project state using AI.
     
     Args:
-        request: The incoming request containing the Discord webhook payload
+        platform: Registered platform name, e.g. "github"
+        request: The incoming request containing the webhook payload
         
     Returns:
         dict: Success message with activity ID and conflict detection results
+              (None for platforms that need an immediate reply, e.g. Slack,
+              whose analysis runs in the background), a duplicate/ignored
+              notice, or a handshake response (Slack url_verification)
         
     Raises:
-        HTTPException: If saving to database fails
+        HTTPException: 404 for an unknown platform, 401 if the request fails
+                       signature verification, 400 for a malformed payload,
+                       429 when the source's quota is used up, 500 if saving
+                       to database fails
     """
+    adapter = get_adapter(platform)
+    if adapter is None:
+        raise HTTPException(status_code=404, detail=f"Unknown platform {platform!r}")
+    
+    body = await request.body()
+    headers = {name.lower(): value for name, value in request.headers.items()}
+    
     try:
-        # Get the raw JSON payload from Discord
-        payload = await request.json()
-        
-        # Get Supabase client
-        supabase = get_supabase_client()
-        
-        # Fetch the first project ID from the database (or use a dummy ID)
-        # TODO: Replace this with actual project_id from webhook payload or context
-        projects_response = supabase.table("projects").select("id").limit(1).execute()
-        if projects_response.data and len(projects_response.data) > 0:
-            project_id = str(projects_response.data[0]["id"])
-        else:
-            project_id = "1"  # Fallback dummy ID if no projects exist
-        
-        # Save the activity to the activities table
-        response = supabase.table("activities").insert({
-            "platform": "Discord",
-            "content": payload,
-            "project_id": project_id,
-            "created_at": datetime.utcnow().isoformat()
-        }).execute()
-        
-        # Check if data was inserted successfully
-        if response.data:
-            activity_id = response.data[0].get("id")
-            
-            # Create a readable summary of the activity for conflict detection
-            activity_summary = f"Discord activity: {json.dumps(payload)[:200]}"
-            
-            # Analyze for conflicts using the Conflict Radar
-            conflict_result = await analyze_activity_for_conflicts(
-                new_activity_text=activity_summary,
-                project_id=project_id
-            )
-            
-            # Build the response
-            response_data = {
-                "status": "success",
-                "message": "Discord webhook received and saved",
-                "activity_id": activity_id,
-                "conflict_check": {
-                    "has_conflict": conflict_result.get("has_conflict", False),
-                    "verdict": conflict_result.get("verdict", "No analysis")
-                }
-            }
-            
-            # If conflict detected, include the warning in the response
-            if conflict_result.get("has_conflict"):
-                response_data["conflict_check"]["warning"] = conflict_result.get("warning", "")
-                response_data["alert"] = "⚠️ CONFLICT DETECTED - Check conflict_check for details"
-            
-            return response_data
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to save Discord webhook"
-            )
-            
+        adapter.verify(headers, body)
+    except InvalidSignature as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    
+    try:
+        payload = json.loads(body)
+        handshake = adapter.handshake(payload)
+        if handshake is not None:
+            return handshake
+        event = adapter.normalize(payload, headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {adapter.platform} payload: {str(e)}")
+    
+    if event is None:
+        return {"status": "ignored", "message": f"{adapter.platform} event ignored"}
+    
+    # Per-source quota only for sources the adapter authenticated
+    await enforce_source_limit(
+        LLM_BUCKET,
+        request,
+        verified_source=(
+            f"{adapter.platform}:{event.source}"
+            if adapter.requires_signature and event.source else None
+        )
+    )
+    
+    try:
+        outcome = (await ingest_events([event], defer_analysis=adapter.defer_analysis))[0]
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error processing Discord webhook: {str(e)}"
+            detail=f"Error processing {adapter.platform} webhook: {str(e)}"
         )
+    
+    return _webhook_response(adapter.platform, outcome)
@@ -1,9 +1,15 @@
 import os
+import json
+import time
+import base64
+import asyncio
+import hashlib
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from app.cache import Cache, MemoryLRUBackend
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +31,52 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 # Initialize HTTPBearer security scheme
 security = HTTPBearer()
 
+# Comma-separated Supabase user IDs allowed to use the admin endpoints
+ADMIN_USER_IDS = {
+    user_id.strip()
+    for user_id in os.getenv("ADMIN_USER_IDS", "").split(",")
+    if user_id.strip()
+}
+
+# How long a validated token is trusted before asking Supabase again (seconds);
+# never past the token's own expiry
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+
+# Validated users stay in this process's memory only, never in a shared tier
+token_cache = Cache([MemoryLRUBackend()])
+
+
+def _token_cache_key(token: str) -> str:
+    # Never keep raw bearer tokens around as cache keys
+    return "auth:token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _token_expires_at(token: str) -> Optional[float]:
+    # Reads the `exp` claim; Supabase has already verified the signature
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except Exception:
+        return None
+
+
+def _token_cache_ttl(token: str) -> float:
+    # Tokens without a readable expiry aren't cached
+    expires_at = _token_expires_at(token)
+    if expires_at is None:
+        return 0.0
+    return min(AUTH_TOKEN_CACHE_TTL, expires_at - time.time())
+
+
+def _user_to_dict(user) -> dict:
+    # Supabase returns a pydantic User model; routes and the cache want a dict
+    if hasattr(user, "model_dump"):
+        return user.model_dump(mode="json")
+    if hasattr(user, "dict"):
+        return user.dict()
+    return dict(user)
+
 
 async def get_current_user(
     token: HTTPAuthorizationCredentials = Depends(security)
@@ -34,6 +86,9 @@ async def get_current_user(
     
     This function validates the Bearer token from the Authorization header
     using Supabase Auth (Admin level) and returns the authenticated user object.
+    Validated tokens are cached in memory for AUTH_TOKEN_CACHE_TTL seconds
+    (or until the token expires, if sooner) so repeated requests don't each
+    pay a round trip to Supabase Auth.
     
     Args:
         token: HTTPAuthorizationCredentials containing the Bearer token
@@ -44,15 +99,24 @@ async def get_current_user(
     Raises:
         HTTPException: 401 Unauthorized if token is invalid, expired, or missing
     """
+    cache_key = _token_cache_key(token.credentials)
+    cached_user = token_cache.get(cache_key)
+    if cached_user is not None:
+        return cached_user
+    
     try:
         # Verify the token with Supabase Auth using the Admin client
         # .get_user() validates the JWT sent from the frontend
-        response = supabase.auth.get_user(token.credentials)
+        response = await asyncio.to_thread(supabase.auth.get_user, token.credentials)
         
         # Check if user data is present in the response
         if response and response.user:
             # Cast User object to dict for easier use in routes
-            return response.user
+            user = _user_to_dict(response.user)
+            ttl = _token_cache_ttl(token.credentials)
+            if ttl > 0:
+                token_cache.set(cache_key, user, ttl)
+            return user
         else:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,4 +130,28 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Could not validate credentials: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+
+async def get_admin_user(current_user: dict = Depends(get_current_user)) -> dict:
+    """
+    Dependency function that only lets administrators through.
+    
+    Administrators are the users listed in the ADMIN_USER_IDS environment
+    variable.
+    
+    Args:
+        current_user: Authenticated user dict injected by get_current_user
+        
+    Returns:
+        dict: The authenticated administrator
+        
+    Raises:
+        HTTPException: 403 Forbidden if the user is not an administrator
+    """
+    if str(current_user.get('id')) not in ADMIN_USER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator access required",
+        )
+    return current_user
@@ -0,0 +1,443 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# In-process LRU tier size
+CACHE_MEMORY_MAX_ENTRIES = int(os.getenv("CACHE_MEMORY_MAX_ENTRIES", "10000"))
+
+# Optional host-local tier shared by all workers: a SQLite file, ideally on
+# tmpfs (e.g. /dev/shm/synapsex-cache.sqlite3); disabled when empty
+CACHE_SQLITE_PATH: str = os.getenv("CACHE_SQLITE_PATH", "")
+CACHE_SQLITE_MAX_ENTRIES = int(os.getenv("CACHE_SQLITE_MAX_ENTRIES", "100000"))
+
+# Optional cross-host tier (any Redis-compatible server)
+CACHE_REDIS_URL: Optional[str] = os.getenv("CACHE_REDIS_URL")
+
+# Default time-to-live for entries (seconds)
+CACHE_DEFAULT_TTL = float(os.getenv("CACHE_DEFAULT_TTL", "300"))
+
+# Marker for "not in cache", so that None can be cached
+MISSING = object()
+
+
+class CacheBackend(ABC):
+    """
+    A single cache tier.
+
+    Values must be JSON-serializable. `get` returns the value together with
+    its absolute expiry (wall-clock seconds) so upper tiers can be refilled
+    without extending the entry's lifetime.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Returns (value, expires_at), or None if absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Stores the value for `ttl` seconds."""
+
+    @abstractmethod
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        """Stores the value only if the key is absent; returns whether it did."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Removes the key."""
+
+
+class MemoryLRUBackend(CacheBackend):
+    """
+    Per-process tier: an LRU-bounded dict.
+
+    Values are stored as-is (no copy), so callers must treat cached objects
+    as read-only.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                return False
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Host-local tier shared by every worker process on the machine.
+
+    Point it at tmpfs (e.g. /dev/shm) so it never touches disk. The file is
+    created readable by the owner only (SQLite gives its WAL files the same
+    mode). Uses WAL mode and one connection per thread.
+    """
+
+    # Expired and overflow rows are pruned once every this many writes
+    PRUNE_EVERY = 256
+
+    def __init__(self, path: str, max_entries: int = CACHE_SQLITE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+        # Owner-only before SQLite opens it, whatever the umask
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        os.chmod(path, 0o600)
+
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS cache_expires_idx ON cache (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._connection().execute(
+            "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, json.dumps(value), time.time() + ttl),
+        )
+        self._after_write()
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE cache.expires_at <= ?",
+            (key, json.dumps(value), now + ttl, now),
+        )
+        self._after_write()
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _after_write(self) -> None:
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY:
+            return
+        connection = self._connection()
+        connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        # Over the size bound: drop the entries closest to expiry
+        connection.execute(
+            "DELETE FROM cache WHERE key IN ("
+            "SELECT key FROM cache ORDER BY expires_at "
+            "LIMIT max(0, (SELECT count(*) FROM cache) - ?))",
+            (self.max_entries,),
+        )
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cross-host tier backed by any Redis-compatible server.
+
+    Requires the `redis` package; size is bounded by the server's own
+    maxmemory policy.
+    """
+
+    def __init__(self, url: str, prefix: str = "cache:"):
+        import redis  # Optional dependency, only needed for this backend
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        pipeline = self._client.pipeline()
+        pipeline.get(self.prefix + key)
+        pipeline.pttl(self.prefix + key)
+        raw, ttl_ms = pipeline.execute()
+        if raw is None:
+            return None
+        expires_at = time.time() + (ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else CACHE_DEFAULT_TTL)
+        return json.loads(raw), expires_at
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        return bool(self._client.set(
+            self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)), nx=True
+        ))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+
+class Cache:
+    """
+    Tiered cache used across the app.
+
+    Reads go through the tiers from fastest (in-process) to most shared,
+    refilling faster tiers on a hit. Writes go to every tier. `get_or_set`
+    adds stampede protection for expensive misses: concurrent callers in
+    the same process share one in-flight load, and workers sharing a tier
+    take a short lease so only one of them runs the loader.
+
+    The SQLite and Redis tiers block, so async code uses `aget`, `aset`,
+    `aadd` and `adelete`, which run them in a worker thread (a memory-only
+    cache, or a hit in the memory tier, stays on the event loop).
+    """
+
+    # How often a worker that lost the lease checks for the leader's result
+    LEASE_POLL_SECONDS = 0.05
+
+    def __init__(self, tiers: List[CacheBackend]):
+        self.tiers = tiers
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None, fresh: bool = False) -> Any:
+        """
+        Returns the cached value for `key`, or `default` when absent or expired.
+
+        With `fresh`, the per-process tier is skipped (when a shared tier
+        exists) so values other workers update are read at their latest.
+        """
+        now = time.time()
+        start = 1 if fresh and self._shared() else 0
+        for index, tier in enumerate(self.tiers[start:], start):
+            try:
+                entry = tier.get(key)
+            except Exception as e:
+                print(f"Cache tier {type(tier).__name__} get failed: {str(e)}")
+                continue
+            if entry is not None:
+                value, expires_at = entry
+                # Refill faster tiers for the entry's remaining lifetime
+                for upper in self.tiers[:index]:
+                    try:
+                        upper.set(key, value, max(0.001, expires_at - now))
+                    except Exception as e:
+                        print(f"Cache tier {type(upper).__name__} set failed: {str(e)}")
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any, ttl: float = CACHE_DEFAULT_TTL) -> None:
+        """Stores `value` under `key` in every tier for `ttl` seconds."""
+        for tier in self.tiers:
+            try:
+                tier.set(key, value, ttl)
+            except Exception as e:
+                print(f"Cache tier {type(tier).__name__} set failed: {str(e)}")
+
+    def add(self, key: str, value: Any, ttl: float = CACHE_DEFAULT_TTL) -> bool:
+        """
+        Stores `value` only if `key` is absent in the most shared tier.
+
+        Returns:
+            bool: True if this caller stored the value (it "won" the key)
+        """
+        if not self.tiers[-1].add(key, value, ttl):
+            return False
+        for tier in self.tiers[:-1]:
+            tier.set(key, value, ttl)
+        return True
+
+    def delete(self, key: str) -> None:
+        """Removes `key` from every tier."""
+        for tier in self.tiers:
+            try:
+                tier.delete(key)
+            except Exception as e:
+                print(f"Cache tier {type(tier).__name__} delete failed: {str(e)}")
+
+    def _shared(self) -> bool:
+        return len(self.tiers) > 1
+
+    async def aget(self, key: str, default: Any = None, fresh: bool = False) -> Any:
+        """`get` for async code: shared tiers are read off the event loop."""
+        if self._shared():
+            entry = None if fresh else self.tiers[0].get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+            return await asyncio.to_thread(self.get, key, default, fresh)
+        return self.get(key, default)
+
+    async def aset(self, key: str, value: Any, ttl: float = CACHE_DEFAULT_TTL) -> None:
+        """`set` for async code."""
+        if self._shared():
+            await asyncio.to_thread(self.set, key, value, ttl)
+        else:
+            self.set(key, value, ttl)
+
+    async def aadd(self, key: str, value: Any, ttl: float = CACHE_DEFAULT_TTL) -> bool:
+        """`add` for async code."""
+        if self._shared():
+            return await asyncio.to_thread(self.add, key, value, ttl)
+        return self.add(key, value, ttl)
+
+    async def adelete(self, key: str) -> None:
+        """`delete` for async code."""
+        if self._shared():
+            await asyncio.to_thread(self.delete, key)
+        else:
+            self.delete(key)
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float = CACHE_DEFAULT_TTL,
+        lease_seconds: float = 30.0,
+    ) -> Any:
+        """
+        Returns the cached value, or loads, caches and returns it on a miss.
+
+        Args:
+            key: Cache key
+            loader: Zero-argument callable returning the awaitable that computes the value
+            ttl: Lifetime of the cached value in seconds
+            lease_seconds: How long other workers wait for the leader before loading themselves
+
+        Returns:
+            Any: The cached or freshly loaded value
+        """
+        value = await self.aget(key, MISSING)
+        if value is not MISSING:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, ttl, lease_seconds))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        # Shield so a cancelled caller doesn't cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved even if every waiter went away
+
+    async def _load(self, key: str, loader, ttl: float, lease_seconds: float) -> Any:
+        if len(self.tiers) < 2:
+            value = await loader()
+            self.set(key, value, ttl)
+            return value
+
+        lease_key = f"lease:{key}"
+        try:
+            leader = await self.aadd(lease_key, True, lease_seconds)
+        except Exception:
+            leader = True  # Shared tier unavailable: just load
+
+        if not leader:
+            # Another worker is loading: wait for its result to appear
+            deadline = time.monotonic() + lease_seconds
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.LEASE_POLL_SECONDS)
+                value = await self.aget(key, MISSING)
+                if value is not MISSING:
+                    return value
+                if await asyncio.to_thread(self.tiers[-1].get, lease_key) is None:
+                    break  # The leader failed without storing a value
+
+        try:
+            value = await loader()
+            await self.aset(key, value, ttl)
+            return value
+        finally:
+            if leader:
+                await self.adelete(lease_key)
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters of this process."""
+        total = self.hits + self.misses
+        return {
+            "tiers": [type(tier).__name__ for tier in self.tiers],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "inflight_loads": len(self._inflight),
+        }
+
+
+def _create_cache() -> Cache:
+    tiers: List[CacheBackend] = [MemoryLRUBackend()]
+    if CACHE_SQLITE_PATH:
+        try:
+            tiers.append(SQLiteBackend(CACHE_SQLITE_PATH))
+        except Exception as e:
+            print(f"SQLite cache tier disabled: {str(e)}")
+    if CACHE_REDIS_URL:
+        tiers.append(RedisBackend(CACHE_REDIS_URL))
+    return Cache(tiers)
+
+
+# Process-wide cache
+cache = _create_cache()
+
+
+def get_cache() -> Cache:
+    """
+    Returns the app-wide tiered cache.
+
+    Returns:
+        Cache: The cache instance
+    """
+    return cache
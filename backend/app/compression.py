@@ -0,0 +1,269 @@
+import os
+import gzip
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+
+try:
+    import brotli  # Optional: enables "br" when installed
+except ImportError:
+    brotli = None
+
+# Load environment variables
+load_dotenv()
+
+# Responses smaller than this are sent uncompressed (bytes)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# Only textual bodies are worth compressing
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+
+def _accepted_encodings(header: str) -> dict:
+    """Parses an Accept-Encoding header into {encoding: q-value}."""
+    encodings = {}
+    for part in header.split(","):
+        pieces = [piece.strip() for piece in part.split(";")]
+        if not pieces[0]:
+            continue
+        quality = 1.0
+        for param in pieces[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        encodings[pieces[0].lower()] = quality
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Picks the best supported content coding the client accepts.
+
+    Args:
+        accept_encoding: Value of the request's Accept-Encoding header
+
+    Returns:
+        str: "br" or "gzip", or None to send the body as-is
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compresses a full response body with the given content coding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def _split_etag_variant(candidate: str) -> Tuple[str, Optional[str]]:
+    """Splits an entity tag into (opaque base, encoding suffix or None)."""
+    candidate = candidate.strip()
+    if candidate.startswith("W/"):
+        candidate = candidate[2:]
+    candidate = candidate.strip('"')
+    for encoding in ("br", "gzip"):
+        suffix = "-" + encoding
+        if candidate.endswith(suffix):
+            return candidate[: -len(suffix)], encoding
+    return candidate, None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an If-None-Match header against the current ETag.
+
+    Uses weak comparison as RFC 9110 requires for If-None-Match, and also
+    accepts the per-encoding variants the compression middleware hands out
+    (e.g. "abc-gzip" for "abc").
+
+    Args:
+        if_none_match: Value of the request's If-None-Match header
+        etag: The current strong ETag, including quotes
+
+    Returns:
+        bool: True if the client's cached copy is still current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag.strip('"')
+    return any(
+        _split_etag_variant(candidate)[0] == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified_etag(if_none_match: Optional[str], etag: str, encoding: Optional[str]) -> str:
+    """
+    Picks the ETag a 304 must carry: that of the representation the client holds.
+
+    A 304 has no body, so the middleware can't tell whether the 200 would
+    have been compressed; the client's If-None-Match says which variant it
+    cached. The variant for the currently negotiated encoding is preferred
+    when the client lists several.
+
+    Args:
+        if_none_match: Value of the request's If-None-Match header
+        etag: The handler's strong ETag, including quotes
+        encoding: The coding negotiated for this request, or None
+
+    Returns:
+        str: The strong ETag (with any encoding suffix) to send back
+    """
+    if not if_none_match or not etag.endswith('"') or etag.startswith("W/"):
+        return etag
+
+    opaque = etag.strip('"')
+    held = [
+        variant
+        for base, variant in map(_split_etag_variant, if_none_match.split(","))
+        if base == opaque
+    ]
+    if not held:
+        return etag
+    variant = encoding if encoding in held else held[0]
+    return f'"{opaque}-{variant}"' if variant else etag
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware for negotiated gzip/brotli response compression.
+
+    Complete (non-streaming) responses above `minimum_size` with a textual
+    content type are compressed with the best coding the client accepts.
+    Streaming responses (e.g. server-sent events) pass through untouched so
+    they are never buffered. Strong ETags get an encoding suffix so each
+    representation keeps a distinct strong validator, and a 304 carries the
+    validator and `Vary: Accept-Encoding` of the representation it
+    revalidates.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        if_none_match = None
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+            elif name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+
+        encoding = choose_encoding(accept_encoding) if accept_encoding else None
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = _HeaderList(start_message.get("headers", []))
+
+            if start_message["status"] == 304:
+                # Same validator and Vary as the 200 being revalidated
+                passthrough = True
+                etag = headers.get("etag")
+                if etag:
+                    headers.set("etag", not_modified_etag(if_none_match, etag, encoding))
+                headers.add_vary("Accept-Encoding")
+                await send({**start_message, "headers": headers.raw})
+                await send(message)
+                return
+
+            if message.get("more_body", False):
+                # Streaming: forward everything unchanged
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if encoding is None or not self._should_compress(
+                start_message["status"], headers, body
+            ):
+                # Not worth it, but a compressible body still varies on
+                # Accept-Encoding so it matches what its 304 will say
+                passthrough = True
+                if self._is_compressible_type(headers) and not headers.get("content-encoding"):
+                    headers.add_vary("Accept-Encoding")
+                await send({**start_message, "headers": headers.raw})
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers.set("content-encoding", encoding)
+            headers.set("content-length", str(len(compressed)))
+            headers.add_vary("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/") and etag.endswith('"'):
+                headers.set("etag", f'{etag[:-1]}-{encoding}"')
+
+            await send({**start_message, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, status_code: int, headers: "_HeaderList", body: bytes) -> bool:
+        if status_code < 200 or status_code in (204, 304):
+            return False
+        if len(body) < self.minimum_size or headers.get("content-encoding"):
+            return False
+        return self._is_compressible_type(headers)
+
+    @staticmethod
+    def _is_compressible_type(headers: "_HeaderList") -> bool:
+        content_type = (headers.get("content-type") or "").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class _HeaderList:
+    """Small helper over raw ASGI header pairs."""
+
+    def __init__(self, raw: List[Tuple[bytes, bytes]]):
+        self.raw = list(raw)
+
+    def get(self, name: str) -> Optional[str]:
+        key = name.encode("latin-1")
+        for header, value in self.raw:
+            if header.lower() == key:
+                return value.decode("latin-1")
+        return None
+
+    def set(self, name: str, value: str) -> None:
+        key = name.encode("latin-1")
+        self.raw = [(header, v) for header, v in self.raw if header.lower() != key]
+        self.raw.append((key, value.encode("latin-1")))
+
+    def add_vary(self, token: str) -> None:
+        current = self.get("vary")
+        if not current:
+            self.set("vary", token)
+        elif token.lower() not in [part.strip().lower() for part in current.split(",")]:
+            self.set("vary", f"{current}, {token}")
@@ -27,4 +27,27 @@ def get_supabase_client() -> Client:
     Returns:
         Client: The Supabase client instance
     """
-    return supabase
\ No newline at end of file
+    return supabase
+
+
+# Postgres SQLSTATE for unique_violation
+UNIQUE_VIOLATION = "23505"
+
+
+def is_unique_violation(error: Exception) -> bool:
+    """
+    Whether a Supabase error means the row or object already exists.
+
+    PostgREST errors carry the Postgres error code in `code`; Storage
+    reports its own unique violation as HTTP 409 ("Duplicate").
+
+    Args:
+        error: The exception raised by the Supabase client
+
+    Returns:
+        bool: True for unique violations
+    """
+    code = str(getattr(error, "code", "") or "")
+    if code in (UNIQUE_VIOLATION, "Duplicate"):
+        return True
+    return str(getattr(error, "status", "") or "") == "409"
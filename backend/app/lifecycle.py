@@ -0,0 +1,255 @@
+import os
+import time
+import signal
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+from dotenv import load_dotenv
+from app.database import get_supabase_client
+from app.cache import get_cache
+from app.services import ai_services, conflict_radar
+from app.services.background import drain, cancel_pending, pending_count, spawn
+from app.services.enrichment import (
+    active_enrichment_count,
+    requeue_unfinished_enrichments,
+    sweep_unfinished_enrichments,
+)
+from app.services.ingest import resolve_project_id
+from app.services.llm_scheduler import get_llm_scheduler, Priority
+
+# Load environment variables
+load_dotenv()
+
+# Send a tiny prompt to each Gemini model at startup to open its connection
+# (opt-in: that's two billed model calls per worker start)
+WARMUP_GEMINI = os.getenv("WARMUP_GEMINI", "false").lower() in ("1", "true", "yes")
+
+# Delay between attempts to reach Supabase while warming up (seconds)
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "2"))
+
+# Time allowed to finish background work on shutdown (seconds); keep it
+# below the platform's SIGTERM-to-SIGKILL grace period
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "25"))
+
+# Paths still served while draining (probes)
+PROBE_PATHS = ("/health", "/ready")
+
+
+class LifecycleState:
+    """Readiness and draining state of this worker."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.ready = False
+        self.draining = False
+        self.warmup = {}
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready and not self.draining,
+            "draining": self.draining,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "warmup": self.warmup,
+        }
+
+
+# Process-wide lifecycle state
+lifecycle_state = LifecycleState()
+
+# Periodic resume of lost enrichment jobs, started once Supabase is reachable
+_enrichment_sweep: Optional[asyncio.Task] = None
+
+
+def get_lifecycle_state() -> LifecycleState:
+    """
+    Returns this worker's lifecycle state.
+
+    Returns:
+        LifecycleState: The state instance
+    """
+    return lifecycle_state
+
+
+async def _timed(name: str, step) -> bool:
+    # Runs one warm-up step, recording its duration or error
+    started = time.monotonic()
+    try:
+        await step()
+    except Exception as e:
+        lifecycle_state.warmup[name] = {"ok": False, "error": str(e)}
+        print(f"Warm-up step {name} failed: {str(e)}")
+        return False
+    lifecycle_state.warmup[name] = {"ok": True, "ms": round((time.monotonic() - started) * 1000, 1)}
+    return True
+
+
+async def _warm_supabase() -> None:
+    # First query opens the pooled HTTP connection (TLS handshake included)
+    supabase = get_supabase_client()
+    await asyncio.to_thread(lambda: supabase.table("projects").select("id").limit(1).execute())
+
+
+async def _warm_gemini() -> None:
+    for model in (ai_services.llm, conflict_radar.get_conflict_llm()):
+        await get_llm_scheduler().run(
+            lambda model=model: model.ainvoke("ping"),
+            priority=Priority.BACKGROUND,
+            tenant="warmup",
+            estimated_tokens=8,
+        )
+
+
+async def _warm_cache() -> None:
+    # Opens the shared tiers' connections and pre-loads webhook routing
+    await get_cache().aget("lifecycle:warmup")
+    await resolve_project_id(get_supabase_client())
+
+
+async def _resume_enrichment() -> None:
+    # Claims run in a thread, the jobs themselves start on this loop
+    restarted = await requeue_unfinished_enrichments()
+    lifecycle_state.warmup["enrichment_restarted"] = restarted
+    if restarted:
+        print(f"Restarted {restarted} unfinished enrichment jobs")
+
+
+async def warm_up() -> None:
+    """
+    Warms connections and caches, then marks the worker ready.
+
+    Supabase is required: it is retried until reachable. Gemini and cache
+    warm-up failures are recorded but don't block readiness. Once Supabase
+    answers, lost enrichment jobs are resumed, and the sweep repeats that
+    every ENRICHMENT_SWEEP_SECONDS, picking up jobs handed back by other
+    workers shutting down.
+    """
+    global _enrichment_sweep
+
+    while not await _timed("supabase", _warm_supabase):
+        if lifecycle_state.draining:
+            return
+        await asyncio.sleep(WARMUP_RETRY_SECONDS)
+
+    if _enrichment_sweep is None:
+        _enrichment_sweep = asyncio.ensure_future(sweep_unfinished_enrichments())
+
+    steps = [_timed("cache", _warm_cache), _timed("enrichment", _resume_enrichment)]
+    if WARMUP_GEMINI:
+        steps.append(_timed("gemini", _warm_gemini))
+    await asyncio.gather(*steps)
+
+    lifecycle_state.ready = True
+    print("Warm-up complete, ready for traffic")
+
+
+def _start_draining() -> None:
+    if not lifecycle_state.draining:
+        lifecycle_state.draining = True
+        print("Draining: rejecting new work")
+
+
+def _install_sigterm_hook() -> None:
+    # Mark the worker as draining the moment SIGTERM arrives (the server only
+    # runs the shutdown phase after in-flight requests finish), then let the
+    # server's own handler proceed
+    try:
+        previous = signal.getsignal(signal.SIGTERM)
+    except ValueError:
+        return
+    if not callable(previous):
+        return
+
+    def handler(signum, frame):
+        _start_draining()
+        previous(signum, frame)
+
+    try:
+        signal.signal(signal.SIGTERM, handler)
+    except ValueError:
+        pass  # Not on the main thread: the shutdown phase still drains
+
+
+async def shutdown(deadline_seconds: float = SHUTDOWN_DRAIN_SECONDS) -> None:
+    """
+    Stops accepting work and drains background tasks within a deadline.
+
+    Enrichment jobs, digest refreshes and any queued LLM calls they wait on
+    get until the deadline to finish; whatever is left is cancelled
+    (enrichment jobs return to 'pending' and another worker's sweep resumes them).
+
+    Args:
+        deadline_seconds: Time allowed for draining
+    """
+    _start_draining()
+    started = time.monotonic()
+    if _enrichment_sweep is not None:
+        _enrichment_sweep.cancel()  # Don't claim new jobs while draining
+    scheduler_stats = get_llm_scheduler().stats()
+    llm_calls = scheduler_stats["in_flight"] + sum(
+        priority["queued"] for priority in scheduler_stats["priorities"].values()
+    )
+    print(
+        f"Draining {pending_count()} background tasks "
+        f"({active_enrichment_count()} enrichment jobs, {llm_calls} queued or running LLM calls)"
+    )
+
+    remaining = await drain(deadline_seconds)
+    if remaining:
+        print(f"Drain deadline reached, cancelling {remaining} background tasks")
+        await cancel_pending()
+
+    print(f"Shutdown drain finished in {time.monotonic() - started:.1f}s")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    FastAPI lifespan: warm up in the background, drain on shutdown.
+
+    The server starts answering immediately (/health is live at once);
+    /ready reports 503 until warm-up completes.
+    """
+    _install_sigterm_hook()
+    warmup_task = spawn(warm_up(), name="warmup")
+    try:
+        yield
+    finally:
+        if not warmup_task.done():
+            warmup_task.cancel()
+        await shutdown()
+
+
+class DrainMiddleware:
+    """
+    Rejects new requests with 503 once the worker is draining.
+
+    Probe endpoints are still served so load balancers can see the state.
+    Pure ASGI so it adds no overhead to normal requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not lifecycle_state.draining
+            or scope.get("path") in PROBE_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", b"5"),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({
+            "type": "http.response.body",
+            "body": b'{"detail":"Server is shutting down. Please retry."}',
+        })
+
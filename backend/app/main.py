@@ -1,20 +1,45 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from app.database import get_supabase_client
 from app.models.project import ProjectCreate, TeamMemberInvite
 from app.services.ai_services import summarize_project, generate_initial_tasks
-from app.api import webhooks
+from app.services.llm_scheduler import get_llm_scheduler
+from app.services.verdict_cache import get_verdict_cache
+from app.services.project_stats import get_project_stats
+from app.services.attachments import detach_project_attachment, store_project_attachment
+from app.services.enrichment import (
+    enqueue_enrichment,
+    get_enrichment_status,
+    retry_enrichment,
+    active_enrichment_count,
+    STATUS_PENDING,
+    STATUS_FAILED,
+)
+from app.api import webhooks, alerts, admin
 from app.auth import get_current_user
+from app.rate_limit import rate_limit_user, CHEAP_BUCKET, LLM_BUCKET
+from app.pagination import encode_cursor, decode_cursor
+from app.cache import get_cache
+from app.compression import CompressionMiddleware, etag_matches
+from app.profiling import ProfilingMiddleware, profiling_enabled
+from app.lifecycle import lifespan, DrainMiddleware, get_lifecycle_state
 from typing import List, Optional
+import hashlib
 import json
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Aura Intelligence API",
     description="Backend API for Aura Intelligence",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Reject new work with 503 while shutting down (innermost, so the 503
+# still carries CORS headers)
+app.add_middleware(DrainMiddleware)
+
 # Configure CORS middleware
 # Configure CORS middleware
 app.add_middleware(
@@ -29,8 +54,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include webhook router
+# Compress large JSON responses (gzip, or brotli when installed)
+app.add_middleware(CompressionMiddleware)
+
+# Opt-in request profiling (not installed at all unless configured)
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Include webhook, alerts and admin routers
 app.include_router(webhooks.router)
+app.include_router(alerts.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -46,9 +80,139 @@ async def root():
     return {"status": "Aura Intelligence API is Live"}
 
 
-@app.post("/projects/")
+@app.get("/health")
+async def health():
+    """
+    Liveness probe.
+    
+    Public endpoint - no authentication required.
+    Answers without touching the database or any other dependency.
+    
+    Returns:
+        dict: Always {"status": "ok"} while the process is serving
+    """
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe.
+    
+    Public endpoint - no authentication required.
+    Returns 503 until startup warm-up (Supabase and Gemini connections,
+    cache and routing state) has finished, and again once the worker
+    starts draining for shutdown.
+    
+    Returns:
+        JSONResponse: Readiness, draining flag and warm-up step timings
+    """
+    snapshot = get_lifecycle_state().snapshot()
+    return JSONResponse(
+        content=snapshot,
+        status_code=200 if snapshot["ready"] else 503
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Runtime metrics for the API.
+    
+    Public endpoint - no authentication required.
+    Exposes the LLM scheduler state, including queue wait time per
+    priority class and current requests/tokens-per-minute usage, the
+    hit rate of the shared cache, Conflict Radar verdict cache hits and
+    estimated model time saved, and the enrichment jobs running in
+    this worker.
+    
+    Returns:
+        dict: Metrics grouped by component
+    """
+    return {
+        "llm_scheduler": get_llm_scheduler().stats(),
+        "cache": get_cache().stats(),
+        "verdict_cache": get_verdict_cache().stats(),
+        "enrichment": {"active_jobs": active_enrichment_count()}
+    }
+
+
+# Columns returned for each project in the dashboard listing
+PROJECT_SUMMARY_COLUMNS = (
+    "id, title, category, priority, visibility, leader_name, tags, "
+    "ai_summary, ai_status, github_repo_url, created_at"
+)
+
+
+@app.get("/projects", dependencies=[Depends(rate_limit_user(CHEAP_BUCKET))])
+async def list_projects(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    List the current user's projects with their activity stats.
+    
+    Protected endpoint - requires valid authentication token.
+    Returns newest projects first, one page at a time. Each project
+    summary carries its activity counts, last activity time and open
+    conflict count, read from counters maintained on webhook ingest
+    (no scan of the activities table).
+    
+    Args:
+        limit: Maximum number of projects in the page
+        cursor: Opaque cursor from the previous page's `next_cursor`
+        current_user: Authenticated user object injected by the dependency
+        
+    Returns:
+        dict: 'projects' (list of summaries with 'stats') and 'next_cursor'
+              (None on the last page)
+        
+    Raises:
+        HTTPException: If the cursor is invalid or fetching projects fails
+    """
+    after_id = decode_cursor(cursor)
+    
+    try:
+        user_id = current_user.get('id')
+        supabase = get_supabase_client()
+        
+        # Keyset pagination on id: fetch one extra row to know if there's a next page
+        query = supabase.table("projects").select(PROJECT_SUMMARY_COLUMNS).eq(
+            "user_id", user_id
+        )
+        if after_id is not None:
+            query = query.lt("id", after_id)
+        response = query.order("id", desc=True).limit(limit + 1).execute()
+        
+        projects = response.data or []
+        has_more = len(projects) > limit
+        projects = projects[:limit]
+        
+        # Attach the materialized counters for the whole page in one query
+        stats = get_project_stats([project["id"] for project in projects])
+        for project in projects:
+            project["stats"] = stats[str(project["id"])]
+        
+        return {
+            "projects": projects,
+            "next_cursor": encode_cursor(projects[-1]["id"]) if has_more else None
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error listing projects: {str(e)}"
+        )
+
+
+@app.post("/projects/", dependencies=[Depends(rate_limit_user(LLM_BUCKET))])
 async def create_project(
     project: ProjectCreate,
+    response: Response,
+    background_enrichment: bool = Query(False),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -57,12 +221,21 @@ async def create_project(
     Protected endpoint - requires valid authentication token.
     Automatically sends invitation emails to team members.
     
+    With `background_enrichment=true` the project is stored right away
+    with `ai_status` "pending" (202 Accepted) and the AI summary and tasks
+    are generated by a background job with retries; poll
+    GET /projects/{id}/enrichment for progress. Otherwise the request
+    waits for Gemini as before.
+    
     Args:
         project: ProjectCreate model with all project details
+        response: Outgoing response, used to set 202 for background enrichment
+        background_enrichment: Generate AI content in the background
         current_user: Authenticated user dict injected by the dependency
         
     Returns:
         dict: The inserted project data including AI-generated summary and tasks
+              (both None while background enrichment is pending)
         
     Raises:
         HTTPException: If validation or creation fails
@@ -83,14 +256,17 @@ async def create_project(
         supabase = get_supabase_client()
         
         # Generate AI summary and initial tasks using the project description
-        ai_summary = await summarize_project(project.description)
-        ai_tasks = await generate_initial_tasks(project.description)
+        if background_enrichment:
+            ai_summary, ai_tasks = None, None
+        else:
+            ai_summary = await summarize_project(project.description, tenant=str(user_id))
+            ai_tasks = await generate_initial_tasks(project.description, tenant=str(user_id))
         
         # Prepare team members data (convert Pydantic models to dicts)
         team_members_data = [member.dict() for member in project.team_members]
         
         # Insert project data into the projects table
-        response = supabase.table("projects").insert({
+        insert_response = supabase.table("projects").insert({
             "title": project.title,
             "description": project.description,
             "category": project.category.value,
@@ -109,18 +285,23 @@ async def create_project(
             "visibility": project.visibility.value,
             "ai_summary": ai_summary,
             "tasks": ai_tasks,
+            **({"ai_status": STATUS_PENDING} if background_enrichment else {}),
         }).execute()
         
         # Check if data was inserted successfully
-        if not response.data:
+        if not insert_response.data:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to create project"
             )
         
-        created_project = response.data[0]
+        created_project = insert_response.data[0]
         project_id = created_project.get('id')
         
+        if background_enrichment:
+            enqueue_enrichment(project_id, project.description, str(user_id))
+            response.status_code = status.HTTP_202_ACCEPTED
+        
         # Send invitation emails to team members (async task)
         # This would be implemented as a background task in production
         for member in project.team_members:
@@ -151,8 +332,85 @@ async def create_project(
             detail=f"Error creating project: {str(e)}"
         )
 
+@app.get(
+    "/projects/{project_id}/enrichment",
+    dependencies=[Depends(rate_limit_user(CHEAP_BUCKET))]
+)
+async def get_project_enrichment(
+    project_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Report the progress of a project's background AI enrichment.
+    
+    Protected endpoint - requires valid authentication token.
+    
+    Args:
+        project_id: The ID of the project
+        current_user: Authenticated user
+        
+    Returns:
+        dict: 'status' (pending, running, complete or failed), 'attempts',
+              'error', 'updated_at', and 'ai_summary'/'tasks' once complete
+        
+    Raises:
+        HTTPException: 404 if the project doesn't exist or isn't the user's
+    """
+    try:
+        enrichment = get_enrichment_status(project_id, current_user.get('id'))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching enrichment status: {str(e)}")
+    
+    if enrichment is None:
+        raise HTTPException(status_code=404, detail="Project not found or unauthorized")
+    return enrichment
+
+
+@app.post(
+    "/projects/{project_id}/enrichment/retry",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit_user(LLM_BUCKET))]
+)
+async def retry_project_enrichment(
+    project_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Re-queue a project's failed background AI enrichment.
+    
+    Protected endpoint - requires valid authentication token.
+    
+    Args:
+        project_id: The ID of the project
+        current_user: Authenticated user
+        
+    Returns:
+        dict: The new enrichment status
+        
+    Raises:
+        HTTPException: 404 if the project doesn't exist or isn't the user's,
+                       409 if its enrichment hasn't failed
+    """
+    try:
+        previous_status = retry_enrichment(project_id, current_user.get('id'))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error re-queueing enrichment: {str(e)}")
+    
+    if previous_status is None:
+        raise HTTPException(status_code=404, detail="Project not found or unauthorized")
+    if previous_status != STATUS_FAILED:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Enrichment is {previous_status}; only failed jobs can be retried"
+        )
+    return {"project_id": project_id, "status": STATUS_PENDING}
+
+
 # Optional: Endpoint for file uploads
-@app.post("/projects/{project_id}/upload-files")
+@app.post(
+    "/projects/{project_id}/upload-files",
+    dependencies=[Depends(rate_limit_user(CHEAP_BUCKET))]
+)
 async def upload_project_files(
     project_id: int,
     files: List[UploadFile] = File(...),
@@ -177,38 +435,16 @@ async def upload_project_files(
         supabase = get_supabase_client()
         
         # Verify project ownership
-        project = supabase.table("projects").select("*").eq("id", project_id).eq("user_id", user_id).single().execute()
+        project = supabase.table("projects").select("id").eq("id", project_id).eq("user_id", user_id).single().execute()
         if not project.data:
             raise HTTPException(status_code=404, detail="Project not found or unauthorized")
         
+        # Content-addressed per owner: identical bytes from the same user are
+        # stored once and re-uploads only add metadata; the attachments list
+        # is appended, not replaced
         uploaded_files = []
-        
         for file in files:
-            # Read file content
-            content = await file.read()
-            
-            # Upload to Supabase Storage
-            file_path = f"{user_id}/{project_id}/{file.filename}"
-            storage_response = supabase.storage.from_("project-files").upload(
-                file_path,
-                content,
-                {"content-type": file.content_type}
-            )
-            
-            # Get public URL
-            file_url = supabase.storage.from_("project-files").get_public_url(file_path)
-            
-            uploaded_files.append({
-                "filename": file.filename,
-                "url": file_url,
-                "size": len(content),
-                "content_type": file.content_type
-            })
-        
-        # Update project with file references
-        supabase.table("projects").update({
-            "attachments": uploaded_files
-        }).eq("id", project_id).execute()
+            uploaded_files.append(await store_project_attachment(project_id, str(user_id), file))
         
         return {
             "status": "success",
@@ -221,9 +457,61 @@ async def upload_project_files(
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
 
 
-@app.get("/projects/{project_id}/activities")
+@app.delete(
+    "/projects/{project_id}/attachments/{sha256}",
+    dependencies=[Depends(rate_limit_user(CHEAP_BUCKET))]
+)
+async def delete_project_attachment(
+    project_id: int,
+    sha256: str,
+    filename: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Detach a file from a project.
+    
+    The stored body is released once no project of the owner references it
+    and removed by the attachment collection after a grace period.
+    
+    Args:
+        project_id: The ID of the project
+        sha256: SHA-256 of the attached file
+        filename: Name the file was attached under
+        current_user: Authenticated user
+        
+    Returns:
+        dict: Detach status
+    """
+    try:
+        user_id = current_user.get('id')
+        if not user_id:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+        
+        supabase = get_supabase_client()
+        
+        # Verify project ownership
+        project = supabase.table("projects").select("id").eq("id", project_id).eq("user_id", user_id).single().execute()
+        if not project.data:
+            raise HTTPException(status_code=404, detail="Project not found or unauthorized")
+        
+        if not detach_project_attachment(project_id, str(user_id), sha256, filename):
+            raise HTTPException(status_code=404, detail="Attachment not found")
+        
+        return {"status": "success", "sha256": sha256, "filename": filename}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"File detach failed: {str(e)}")
+
+
+@app.get(
+    "/projects/{project_id}/activities",
+    dependencies=[Depends(rate_limit_user(CHEAP_BUCKET))]
+)
 async def get_project_activities(
     project_id: str,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -234,12 +522,18 @@ async def get_project_activities(
     This allows the frontend to display the project timeline with any AI
     conflict alerts at the top.
     
+    Supports conditional GET: the response carries a strong ETag hashed
+    from the serialized list actually returned, and a matching
+    If-None-Match gets a 304 without the body being sent.
+    
     Args:
         project_id: The ID of the project to fetch activities for
+        request: The incoming request (for If-None-Match)
         current_user: Authenticated user object injected by the dependency
         
     Returns:
-        list: A list of activity objects ordered by created_at (descending)
+        list: A list of activity objects ordered by created_at (descending),
+              or an empty 304 response if the client's copy is current
         
     Raises:
         HTTPException: If fetching activities fails or user is not authenticated
@@ -253,14 +547,27 @@ async def get_project_activities(
             "project_id", project_id
         ).order("created_at", desc=True).execute()
         
-        # Return the activities list (empty list if no activities found)
-        if response.data:
-            return response.data
-        else:
-            return []
+        # Return the activities list (empty list if no activities found);
+        # the validator is taken from exactly these bytes, so it can't
+        # describe a different snapshot than the body
+        payload = JSONResponse(content=response.data or [])
+        etag = '"' + hashlib.sha256(payload.body).hexdigest()[:32] + '"'
+        
+        # Authenticated data: browsers may keep it but must revalidate, proxies must not
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+            "Vary": "Authorization"
+        }
+        
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        
+        payload.headers.update(headers)
+        return payload
             
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching project activities: {str(e)}"
-        )
\ No newline at end of file
+        )
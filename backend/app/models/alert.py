@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+
+class AlertReadRequest(BaseModel):
+    """
+    Pydantic model for marking conflict alerts as read.
+
+    Either list the alerts explicitly or give the newest alert ID seen,
+    which marks it and everything older.
+    """
+    alert_ids: List[int] = Field(default=[], description="Alerts to mark as read")
+    up_to_id: Optional[int] = Field(None, description="Mark every alert up to this ID as read")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "up_to_id": 42
+            }
+        }
@@ -0,0 +1,45 @@
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException
+
+
+def encode_cursor(last_id) -> str:
+    """
+    Encodes the last row ID of a page into an opaque cursor string.
+
+    Args:
+        last_id: ID of the last row returned in the current page
+
+    Returns:
+        str: URL-safe cursor for the next page
+    """
+    raw = json.dumps({"id": last_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor: The cursor from the query string, or None for the first page
+
+    Returns:
+        int: The last row ID of the previous page, or None
+
+    Raises:
+        HTTPException: 400 Bad Request if the cursor is malformed or its ID isn't an integer
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except Exception:
+        last_id = None
+
+    # bool is an int subclass but never a valid row ID
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return last_id
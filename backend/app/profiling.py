@@ -0,0 +1,253 @@
+import os
+import sys
+import time
+import uuid
+import hmac
+import random
+import asyncio
+import threading
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
+from dotenv import load_dotenv
+from app.cache import get_cache
+
+# Load environment variables
+load_dotenv()
+
+# Secret that opts a request into profiling via the X-Profile-Token header
+PROFILING_TOKEN: Optional[str] = os.getenv("PROFILING_TOKEN")
+
+# Fraction of all requests profiled automatically (0 disables sampling)
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+
+# Stack sampling interval (milliseconds)
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+
+# Retention: number of stored profiles and how long each is kept (seconds)
+PROFILING_RETENTION = int(os.getenv("PROFILING_RETENTION", "100"))
+PROFILING_TTL = float(os.getenv("PROFILING_TTL", "86400"))
+
+# Collapsed stacks kept per profile
+TOP_STACKS = 200
+
+# Cache key of the list of stored profile IDs (newest first)
+PROFILE_INDEX_KEY = "profiles:index"
+
+# Lease serializing index updates across workers sharing the cache (seconds)
+PROFILE_INDEX_LEASE_SECONDS = 5.0
+PROFILE_INDEX_LEASE_POLL_SECONDS = 0.01
+
+# Serializes index updates within this process
+_index_lock = asyncio.Lock()
+
+# Where a sample's time is attributed, checked in this order
+_CATEGORY_MARKERS = (
+    ("supabase", ("supabase", "postgrest", "gotrue", "storage3", "realtime")),
+    ("llm", ("langchain", "google/generativeai", "google/ai", "grpc")),
+)
+
+
+def profiling_enabled() -> bool:
+    """
+    Whether any request can be profiled in this configuration.
+
+    When it returns False the middleware isn't installed at all, so the
+    hook costs nothing.
+    """
+    return bool(PROFILING_TOKEN) or PROFILING_SAMPLE_RATE > 0
+
+
+def _categorize(filenames: List[str]) -> str:
+    """Attributes one stack sample (innermost frame first) to a time category."""
+    for category, markers in _CATEGORY_MARKERS:
+        for filename in filenames:
+            if any(marker in filename for marker in markers):
+                return category
+
+    innermost = filenames[0] if filenames else ""
+    if f"{os.sep}json{os.sep}" in innermost:
+        return "json"
+    if innermost.endswith("selectors.py") or f"{os.sep}asyncio{os.sep}" in innermost:
+        return "event_loop"
+    return "app"
+
+
+class SamplingProfiler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+
+    For async endpoints the sampled thread is the event loop thread, so
+    samples of other requests interleaved on the loop are included too;
+    time spent waiting on I/O shows up as `event_loop`.
+    """
+
+    def __init__(self, thread_id: int, interval_seconds: float):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        # The sampler may be mid-sample: wait for it off the event loop
+        await asyncio.to_thread(self._thread.join)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            names, filenames = [], []
+            while frame is not None and len(names) < 64:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                filenames.append(code.co_filename)
+                frame = frame.f_back
+
+            self.samples += 1
+            self.categories[_categorize(filenames)] += 1
+            self.stacks[";".join(reversed(names))] += 1
+
+
+@asynccontextmanager
+async def _locked_index():
+    # Index updates are read-modify-write: one at a time in this process, and
+    # under a short cache lease across workers (taken anyway once it expires,
+    # so a crashed holder can't block profiling)
+    async with _index_lock:
+        cache = get_cache()
+        lease_key = f"lease:{PROFILE_INDEX_KEY}"
+        deadline = time.monotonic() + PROFILE_INDEX_LEASE_SECONDS
+        leased = await cache.aadd(lease_key, True, PROFILE_INDEX_LEASE_SECONDS)
+        while not leased and time.monotonic() < deadline:
+            await asyncio.sleep(PROFILE_INDEX_LEASE_POLL_SECONDS)
+            leased = await cache.aadd(lease_key, True, PROFILE_INDEX_LEASE_SECONDS)
+        try:
+            yield
+        finally:
+            if leased:
+                await cache.adelete(lease_key)
+
+
+async def store_profile(profile: dict) -> None:
+    """
+    Stores a profile in the shared cache and trims the index to the retention limit.
+
+    Args:
+        profile: The profile document built by the middleware
+    """
+    cache = get_cache()
+    await cache.aset(f"profiles:{profile['id']}", profile, PROFILING_TTL)
+
+    async with _locked_index():
+        index = await cache.aget(PROFILE_INDEX_KEY, fresh=True) or []
+        index = [profile["id"]] + [profile_id for profile_id in index if profile_id != profile["id"]]
+        for expired_id in index[PROFILING_RETENTION:]:
+            await cache.adelete(f"profiles:{expired_id}")
+        await cache.aset(PROFILE_INDEX_KEY, index[:PROFILING_RETENTION], PROFILING_TTL)
+
+
+async def list_profiles() -> List[dict]:
+    """
+    Returns summaries of stored profiles, newest first.
+
+    Returns:
+        list: Profile documents without their stacks
+    """
+    cache = get_cache()
+    summaries = []
+    for profile_id in await cache.aget(PROFILE_INDEX_KEY, fresh=True) or []:
+        profile = await cache.aget(f"profiles:{profile_id}")
+        if profile:
+            summaries.append({key: value for key, value in profile.items() if key != "stacks"})
+    return summaries
+
+
+async def get_profile(profile_id: str) -> Optional[dict]:
+    """
+    Returns a stored profile, or None if it doesn't exist or has expired.
+    """
+    return await get_cache().aget(f"profiles:{profile_id}")
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that runs selected requests under the sampling profiler.
+
+    A request is profiled when it carries `X-Profile-Token` equal to
+    PROFILING_TOKEN, or when it's picked by PROFILING_SAMPLE_RATE. The
+    response then carries `X-Profile-Id`, and the stored profile (time
+    breakdown across Supabase, LLM, JSON, event loop and app code, plus the
+    hottest stacks) can be fetched from GET /admin/profiles/{id}.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _selected(self, scope) -> bool:
+        if PROFILING_TOKEN:
+            for name, value in scope.get("headers", []):
+                if name == b"x-profile-token":
+                    return hmac.compare_digest(value.decode("latin-1"), PROFILING_TOKEN)
+        return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [
+                        (b"x-profile-id", profile_id.encode("latin-1"))
+                    ],
+                }
+            await send(message)
+
+        profiler = SamplingProfiler(threading.get_ident(), PROFILING_INTERVAL_MS / 1000)
+        started_at = datetime.utcnow().isoformat()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await profiler.stop()
+            duration_ms = (time.perf_counter() - started) * 1000
+
+            # Spread the wall time over categories in proportion to their samples
+            breakdown = {
+                category: round(duration_ms * count / profiler.samples, 2)
+                for category, count in profiler.categories.items()
+            } if profiler.samples else {}
+
+            try:
+                await store_profile({
+                    "id": profile_id,
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "status": status_code,
+                    "started_at": started_at,
+                    "duration_ms": round(duration_ms, 2),
+                    "interval_ms": PROFILING_INTERVAL_MS,
+                    "samples": profiler.samples,
+                    "breakdown_ms": breakdown,
+                    "stacks": dict(profiler.stacks.most_common(TOP_STACKS)),
+                })
+            except Exception as e:
+                print(f"Failed to store profile {profile_id}: {str(e)}")
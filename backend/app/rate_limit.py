@@ -0,0 +1,292 @@
+import os
+import math
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional
+from fastapi import Depends, HTTPException, Request, status
+from dotenv import load_dotenv
+from app.auth import get_current_user
+
+# Load environment variables
+load_dotenv()
+
+# Optional shared backend for multi-worker deployments (Redis-compatible)
+RATE_LIMIT_REDIS_URL: Optional[str] = os.getenv("RATE_LIMIT_REDIS_URL")
+
+# Maximum number of idle buckets kept by the in-memory backend
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class Bucket:
+    """
+    Token bucket configuration for a class of routes.
+
+    A bucket holds up to `capacity` tokens and refills continuously at
+    `refill_per_second`; each request consumes one token.
+    """
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+
+
+# Cheap routes (plain database reads/writes)
+CHEAP_BUCKET = Bucket(
+    name="cheap",
+    capacity=float(os.getenv("RATE_LIMIT_CHEAP_CAPACITY", "60")),
+    refill_per_second=float(os.getenv("RATE_LIMIT_CHEAP_PER_SECOND", "1.0")),
+)
+
+# Routes that trigger Gemini calls
+LLM_BUCKET = Bucket(
+    name="llm",
+    capacity=float(os.getenv("RATE_LIMIT_LLM_CAPACITY", "5")),
+    refill_per_second=float(os.getenv("RATE_LIMIT_LLM_PER_SECOND", "0.1")),
+)
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token bucket state.
+
+    Subclasses implement `consume`, which atomically refills and debits a
+    bucket and reports how long the caller must wait if it is empty.
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, bucket: Bucket, cost: float = 1.0) -> float:
+        """
+        Tries to take `cost` tokens from the bucket stored under `key`.
+
+        Args:
+            key: Bucket key (bucket name plus user, client address or verified source)
+            bucket: The bucket configuration
+            cost: Number of tokens the request needs
+
+        Returns:
+            float: 0 if the request is admitted, otherwise seconds until it would be
+        """
+
+
+class InMemoryBackend(RateLimitBackend):
+    """
+    Per-process backend: O(1) dict lookup per check, LRU-bounded in size.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def consume(self, key: str, bucket: Bucket, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (bucket.capacity, now))
+            tokens = min(bucket.capacity, tokens + (now - updated) * bucket.refill_per_second)
+
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / bucket.refill_per_second
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                # Evicting the least recently used bucket only forgets a
+                # client that has been idle longest, i.e. one with a full bucket
+                self._buckets.popitem(last=False)
+
+            return wait
+
+
+# Refill-and-debit runs server-side so concurrent workers can't race
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Shared backend for several uvicorn workers or hosts.
+
+    Works with any Redis-compatible server; requires the `redis` package.
+    Uses the asyncio client so checks never block the event loop.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio  # Optional dependency, only needed for this backend
+
+        self.prefix = prefix
+        self._client = redis.asyncio.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def consume(self, key: str, bucket: Bucket, cost: float = 1.0) -> float:
+        wait = await self._script(
+            keys=[self.prefix + key],
+            args=[bucket.capacity, bucket.refill_per_second, cost],
+        )
+        return float(wait)
+
+
+def _create_backend() -> RateLimitBackend:
+    if RATE_LIMIT_REDIS_URL:
+        return RedisBackend(RATE_LIMIT_REDIS_URL)
+    return InMemoryBackend()
+
+
+# Process-wide limiter backend
+rate_limit_backend: RateLimitBackend = _create_backend()
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """
+    Returns the active rate limiter backend.
+
+    Returns:
+        RateLimitBackend: The backend instance
+    """
+    return rate_limit_backend
+
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    """
+    Replaces the rate limiter backend (e.g. with a shared one).
+
+    Args:
+        backend: The backend to use for all subsequent checks
+    """
+    global rate_limit_backend
+    rate_limit_backend = backend
+
+
+async def _enforce(bucket: Bucket, subject: str) -> None:
+    """
+    Debits the bucket for `subject`, raising 429 when it is empty.
+
+    Raises:
+        HTTPException: 429 Too Many Requests with a Retry-After header
+    """
+    wait = await get_rate_limit_backend().consume(f"{bucket.name}:{subject}", bucket)
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded. Please retry later.",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+
+def rate_limit_user(bucket: Bucket) -> Callable:
+    """
+    Builds a dependency that rate-limits a route per authenticated user.
+
+    Args:
+        bucket: Which bucket (cheap or LLM-backed) the route draws from
+
+    Returns:
+        Callable: A FastAPI dependency to use in `dependencies=[...]`
+    """
+    async def dependency(current_user: dict = Depends(get_current_user)) -> None:
+        await _enforce(bucket, f"user:{_user_id(current_user)}")
+
+    return dependency
+
+
+def _source_subject(source: str) -> str:
+    return f"source:{source}"
+
+
+async def source_limit_wait(bucket: Bucket, verified_source: str) -> float:
+    """
+    Debits the bucket of an authenticated event source without raising.
+
+    For routes that report throttling per item (e.g. batch lines).
+
+    Args:
+        bucket: Which bucket the route draws from
+        verified_source: Source identity authenticated by an adapter or relay
+
+    Returns:
+        float: 0 if admitted, otherwise seconds until the source may retry
+    """
+    return await get_rate_limit_backend().consume(
+        f"{bucket.name}:{_source_subject(verified_source)}", bucket
+    )
+
+
+async def enforce_source_limit(
+    bucket: Bucket,
+    request: Request,
+    verified_source: Optional[str] = None
+) -> None:
+    """
+    Rate-limits a webhook request per event source.
+
+    Only an authenticated identity may select the bucket: the source an
+    adapter has verified (a signed GitHub repository, Discord guild or Slack
+    workspace). Unsigned payload fields could be forged to drain someone
+    else's quota, so requests without a verified source are limited per
+    client address instead.
+    Called by the route after verification, since it needs the adapter.
+
+    Args:
+        bucket: Which bucket the route draws from
+        request: The incoming request
+        verified_source: Source authenticated by the adapter, if any
+
+    Raises:
+        HTTPException: 429 Too Many Requests with a Retry-After header
+    """
+    if verified_source:
+        await _enforce(bucket, _source_subject(verified_source))
+    else:
+        await _enforce(bucket, f"ip:{_client_host(request)}")
+
+
+def rate_limit_client(bucket: Bucket) -> Callable:
+    """
+    Builds a dependency that rate-limits a route per client address.
+
+    Used where the body can't be inspected up front (e.g. streamed NDJSON).
+
+    Args:
+        bucket: Which bucket the route draws from
+
+    Returns:
+        Callable: A FastAPI dependency to use in `dependencies=[...]`
+    """
+    async def dependency(request: Request) -> None:
+        await _enforce(bucket, f"ip:{_client_host(request)}")
+
+    return dependency
+
+
+def _client_host(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def _user_id(current_user) -> Optional[str]:
+    # Accepts the user dict from get_current_user as well as a bare User object
+    if isinstance(current_user, dict):
+        return current_user.get('id')
+    return getattr(current_user, 'id', None)
@@ -1,8 +1,11 @@
 import os
 import json
+import hashlib
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
+from app.services.llm_scheduler import get_llm_scheduler, estimate_tokens, Priority
+from app.cache import get_cache
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,8 +25,32 @@ llm = ChatGoogleGenerativeAI(
     convert_system_message_to_human=True
 )
 
+# How long generated summaries/tasks are reused for an identical description (seconds)
+AI_RESULT_CACHE_TTL = float(os.getenv("AI_RESULT_CACHE_TTL", "3600"))
 
-async def summarize_project(description: str) -> dict:
+
+def _description_key(kind: str, description: str) -> str:
+    # Cache key for an AI result derived from a project description
+    digest = hashlib.sha256(description.encode("utf-8")).hexdigest()
+    return f"ai:{kind}:{digest}"
+
+
+def _parse_json_content(content: str):
+    # Remove markdown code blocks if present, then parse the JSON response
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    
+    return json.loads(content)
+
+
+async def summarize_project(
+    description: str,
+    tenant: str = "default",
+    priority: Priority = Priority.INTERACTIVE,
+    fallback: bool = True
+) -> dict:
     """
     Summarizes a project description as a Project Manager would.
     
@@ -33,10 +60,41 @@ async def summarize_project(description: str) -> dict:
     
     Args:
         description (str): The raw project description from the user
+        tenant (str): Fair-queueing key for the LLM scheduler (the user ID)
+        priority (Priority): Scheduler class; BACKGROUND for enrichment jobs
+        fallback (bool): Return placeholder content if the answer can't be parsed;
+                         if False the JSONDecodeError is raised so the caller can retry
         
     Returns:
         dict: A dictionary containing 'summary_points' (list) and 'tech_stack' (list)
     """
+    try:
+        # Identical descriptions (e.g. a retried request) share one LLM call
+        return await get_cache().get_or_set(
+            _description_key("summary", description),
+            lambda: _request_project_summary(description, tenant, priority),
+            ttl=AI_RESULT_CACHE_TTL,
+        )
+        
+    except json.JSONDecodeError as e:
+        if not fallback:
+            raise
+        # Fallback if JSON parsing fails
+        return {
+            "summary_points": [
+                "Failed to parse AI response",
+                "Please try again with a clearer description",
+                "Contact support if this persists"
+            ],
+            "tech_stack": ["N/A"]
+        }
+    except Exception as e:
+        # Handle any other errors
+        raise Exception(f"Error generating project summary: {str(e)}")
+
+
+async def _request_project_summary(description: str, tenant: str, priority: Priority) -> dict:
+    """Asks the model for a project summary; raises JSONDecodeError on bad output."""
     # Create the system message to set the AI's role as a Project Manager
     system_prompt = SystemMessage(content="""
     You are an experienced Project Manager specializing in tech projects.
@@ -61,40 +119,24 @@ async def summarize_project(description: str) -> dict:
     Only return the JSON, no additional text.
     """)
     
-    try:
-        # Invoke the LLM with the messages
-        response = llm.invoke([system_prompt, user_prompt])
-        
-        # Extract the content from the response
-        content = response.content
-        
-        # Parse the JSON response
-        # Remove markdown code blocks if present
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(content)
-        
-        return result
-        
-    except json.JSONDecodeError as e:
-        # Fallback if JSON parsing fails
-        return {
-            "summary_points": [
-                "Failed to parse AI response",
-                "Please try again with a clearer description",
-                "Contact support if this persists"
-            ],
-            "tech_stack": ["N/A"]
-        }
-    except Exception as e:
-        # Handle any other errors
-        raise Exception(f"Error generating project summary: {str(e)}")
+    # Invoke the LLM through the scheduler (interactive when a user is waiting)
+    messages = [system_prompt, user_prompt]
+    response = await get_llm_scheduler().run(
+        lambda: llm.ainvoke(messages),
+        priority=priority,
+        tenant=tenant,
+        estimated_tokens=estimate_tokens(messages),
+    )
+    
+    return _parse_json_content(response.content)
 
 
-async def generate_initial_tasks(description: str) -> list:
+async def generate_initial_tasks(
+    description: str,
+    tenant: str = "default",
+    priority: Priority = Priority.INTERACTIVE,
+    fallback: bool = True
+) -> list:
     """
     Generates a list of 5 initial tasks for a project team to get started.
     
@@ -103,11 +145,42 @@ async def generate_initial_tasks(description: str) -> list:
     
     Args:
         description (str): The project description
+        tenant (str): Fair-queueing key for the LLM scheduler (the user ID)
+        priority (Priority): Scheduler class; BACKGROUND for enrichment jobs
+        fallback (bool): Return placeholder tasks if the answer can't be parsed;
+                         if False the JSONDecodeError is raised so the caller can retry
         
     Returns:
         list: A list of 5 task dictionaries, each containing 'task_number', 
               'title', and 'description'
     """
+    try:
+        # Identical descriptions (e.g. a retried request) share one LLM call
+        return await get_cache().get_or_set(
+            _description_key("tasks", description),
+            lambda: _request_initial_tasks(description, tenant, priority),
+            ttl=AI_RESULT_CACHE_TTL,
+        )
+        
+    except json.JSONDecodeError as e:
+        if not fallback:
+            raise
+        # Fallback if JSON parsing fails
+        return [
+            {
+                "task_number": i,
+                "title": f"Task {i}",
+                "description": "Failed to generate task. Please try again."
+            }
+            for i in range(1, 6)
+        ]
+    except Exception as e:
+        # Handle any other errors
+        raise Exception(f"Error generating initial tasks: {str(e)}")
+
+
+async def _request_initial_tasks(description: str, tenant: str, priority: Priority) -> list:
+    """Asks the model for the initial tasks; raises JSONDecodeError on bad output."""
     # Create the system message to set the AI's role
     system_prompt = SystemMessage(content="""
     You are an experienced Project Manager who excels at breaking down projects 
@@ -136,38 +209,19 @@ async def generate_initial_tasks(description: str) -> list:
     Only return the JSON array, no additional text.
     """)
     
-    try:
-        # Invoke the LLM with the messages
-        response = llm.invoke([system_prompt, user_prompt])
-        
-        # Extract the content from the response
-        content = response.content
-        
-        # Parse the JSON response
-        # Remove markdown code blocks if present
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(content)
-        
-        # Ensure we have exactly 5 tasks
-        if len(result) > 5:
-            result = result[:5]
-        
-        return result
-        
-    except json.JSONDecodeError as e:
-        # Fallback if JSON parsing fails
-        return [
-            {
-                "task_number": i,
-                "title": f"Task {i}",
-                "description": "Failed to generate task. Please try again."
-            }
-            for i in range(1, 6)
-        ]
-    except Exception as e:
-        # Handle any other errors
-        raise Exception(f"Error generating initial tasks: {str(e)}")
\ No newline at end of file
+    # Invoke the LLM through the scheduler (interactive when a user is waiting)
+    messages = [system_prompt, user_prompt]
+    response = await get_llm_scheduler().run(
+        lambda: llm.ainvoke(messages),
+        priority=priority,
+        tenant=tenant,
+        estimated_tokens=estimate_tokens(messages),
+    )
+    
+    result = _parse_json_content(response.content)
+    
+    # Ensure we have exactly 5 tasks
+    if len(result) > 5:
+        result = result[:5]
+    
+    return result
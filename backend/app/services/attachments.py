@@ -0,0 +1,205 @@
+import os
+import hashlib
+from typing import Tuple
+from fastapi import UploadFile
+from app.database import get_supabase_client, is_unique_violation
+
+# Storage bucket holding project attachments
+ATTACHMENTS_BUCKET = "project-files"
+
+# Bytes read from an upload at a time while hashing
+READ_CHUNK_SIZE = 1024 * 1024
+
+# How long an object nobody references is kept before it is collected
+# (seconds); covers uploads that checked for the object just before release
+ATTACHMENT_COLLECT_GRACE_SECONDS = int(os.getenv("ATTACHMENT_COLLECT_GRACE_SECONDS", "3600"))
+
+# SQLSTATE attach_project_file raises when the object was collected under it
+OBJECT_COLLECTED = "P0002"
+
+
+async def read_and_hash(file: UploadFile) -> Tuple[bytes, str]:
+    """
+    Reads an uploaded file, computing its SHA-256 in the same pass.
+
+    Args:
+        file: The uploaded file
+
+    Returns:
+        tuple: (file content, hex SHA-256 digest)
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    while True:
+        chunk = await file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+
+def object_path(owner_id: str, sha256: str) -> str:
+    """
+    Returns the content-addressed storage path of a file body.
+
+    Bodies are addressed per owner, so identical bytes uploaded by two users
+    are stored twice and neither can learn that the other holds the file.
+
+    Args:
+        owner_id (str): The user who owns the object
+        sha256 (str): Hex SHA-256 of the content
+
+    Returns:
+        str: Path inside the attachments bucket
+    """
+    return f"{owner_id}/objects/{sha256[:2]}/{sha256}"
+
+
+def _object_exists(owner_id: str, sha256: str) -> bool:
+    supabase = get_supabase_client()
+    response = supabase.table("attachment_objects").select("sha256").eq(
+        "owner_id", owner_id
+    ).eq("sha256", sha256).limit(1).execute()
+    return bool(response.data)
+
+
+def _upload_object(path: str, content: bytes, content_type: str) -> bool:
+    # Returns False if the body is already stored at this path
+    try:
+        get_supabase_client().storage.from_(ATTACHMENTS_BUCKET).upload(
+            path,
+            content,
+            {"content-type": content_type}
+        )
+    except Exception as e:
+        # A concurrent upload of the same bytes won the race
+        if not is_unique_violation(e):
+            raise
+        return False
+    return True
+
+
+def _is_object_collected(error: Exception) -> bool:
+    return str(getattr(error, "code", "") or "") == OBJECT_COLLECTED
+
+
+async def store_project_attachment(project_id: int, owner_id: str, file: UploadFile) -> dict:
+    """
+    Stores one uploaded file for a project, deduplicated by content hash.
+
+    Deduplication is scoped to the owner: the body is uploaded only if this
+    owner has no object with the same SHA-256 yet; otherwise the upload is a
+    metadata-only operation. The reference is recorded, ref_count bumped and
+    the file appended to projects.attachments atomically by the
+    attach_project_file database function (see
+    migrations/008_attachment_owner_scope.sql).
+
+    Args:
+        project_id (int): The project the file belongs to
+        owner_id (str): The user who owns the project
+        file (UploadFile): The uploaded file
+
+    Returns:
+        dict: Attachment metadata plus 'deduplicated' (body already stored
+              for this owner) and 'attached' (False if the same file/name was
+              already attached)
+    """
+    supabase = get_supabase_client()
+    content, sha256 = await read_and_hash(file)
+    path = object_path(owner_id, sha256)
+
+    deduplicated = _object_exists(owner_id, sha256)
+    if not deduplicated:
+        deduplicated = not _upload_object(path, content, file.content_type)
+
+    attachment = {
+        "filename": file.filename,
+        "url": supabase.storage.from_(ATTACHMENTS_BUCKET).get_public_url(path),
+        "size": len(content),
+        "content_type": file.content_type,
+        "sha256": sha256,
+    }
+    params = {
+        "p_owner_id": owner_id,
+        "p_project_id": project_id,
+        "p_sha256": sha256,
+        "p_storage_path": path,
+        "p_size": len(content),
+        "p_content_type": file.content_type,
+        "p_filename": file.filename,
+        "p_attachment": attachment,
+        # Only a fresh upload may create the object row; a deduplicated
+        # attach must find it still there
+        "p_uploaded": not deduplicated,
+    }
+
+    try:
+        response = supabase.rpc("attach_project_file", params).execute()
+    except Exception as e:
+        # The object was collected between the existence check and the
+        # attach: store the body again and record it afresh
+        if not _is_object_collected(e):
+            raise
+        _upload_object(path, content, file.content_type)
+        deduplicated = False
+        params["p_uploaded"] = True
+        response = supabase.rpc("attach_project_file", params).execute()
+
+    return {
+        **attachment,
+        "deduplicated": deduplicated,
+        "attached": bool(response.data),
+    }
+
+
+def detach_project_attachment(project_id: int, owner_id: str, sha256: str, filename: str) -> bool:
+    """
+    Removes one file from a project and releases its reference.
+
+    The reference row is deleted, the object's ref_count decremented and the
+    entry removed from projects.attachments atomically by the
+    detach_project_file database function. An object whose last reference
+    goes is marked released; its body stays in storage until
+    collect_unreferenced_attachments() runs after the grace period.
+
+    Args:
+        project_id (int): The project the file is attached to
+        owner_id (str): The user who owns the project
+        sha256 (str): Hex SHA-256 of the file
+        filename (str): The name it was attached under
+
+    Returns:
+        bool: False if no such attachment existed
+    """
+    response = get_supabase_client().rpc("detach_project_file", {
+        "p_owner_id": owner_id,
+        "p_project_id": project_id,
+        "p_sha256": sha256,
+        "p_filename": filename,
+    }).execute()
+    return bool(response.data)
+
+
+def collect_unreferenced_attachments(grace_seconds: int = ATTACHMENT_COLLECT_GRACE_SECONDS) -> int:
+    """
+    Deletes objects released longer than grace_seconds ago, rows and bodies.
+
+    Rows go first (collect_attachment_objects) so no new reference can be
+    made to a body that is about to disappear; an upload racing the
+    collection sees the object missing and stores it again.
+
+    Args:
+        grace_seconds (int): How long an unreferenced object is kept
+
+    Returns:
+        int: Number of storage bodies removed
+    """
+    supabase = get_supabase_client()
+    response = supabase.rpc("collect_attachment_objects", {
+        "p_grace_seconds": int(grace_seconds),
+    }).execute()
+    paths = [path for path in response.data or [] if path]
+    if paths:
+        supabase.storage.from_(ATTACHMENTS_BUCKET).remove(paths)
+    return len(paths)
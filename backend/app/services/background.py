@@ -0,0 +1,75 @@
+import asyncio
+from typing import Awaitable, Optional, Set
+
+# Background tasks started by this process that haven't finished yet
+_tasks: Set[asyncio.Task] = set()
+
+
+def spawn(coro: Awaitable, name: Optional[str] = None) -> asyncio.Task:
+    """
+    Starts fire-and-forget work that must not be lost silently.
+
+    The task is tracked until it finishes (so it isn't garbage-collected
+    mid-flight and can be drained on shutdown), and failures are logged.
+
+    Args:
+        coro: The coroutine to run
+        name: Optional task name for logs
+
+    Returns:
+        asyncio.Task: The running task
+    """
+    task = asyncio.ensure_future(coro)
+    if name:
+        task.set_name(name)
+    _tasks.add(task)
+    task.add_done_callback(_on_done)
+    return task
+
+
+def _on_done(task: asyncio.Task) -> None:
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Background task {task.get_name()} failed: {str(task.exception())}")
+
+
+def pending_count() -> int:
+    """Returns how many background tasks are still running."""
+    return len(_tasks)
+
+
+async def drain(timeout: float) -> int:
+    """
+    Waits up to `timeout` seconds for background tasks to finish.
+
+    Tasks spawned while draining (e.g. a digest refresh started by a
+    finishing analysis) are waited for too.
+
+    Args:
+        timeout: Deadline in seconds
+
+    Returns:
+        int: Number of tasks still running when the deadline passed
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while _tasks:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        await asyncio.wait(set(_tasks), timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+    return len(_tasks)
+
+
+async def cancel_pending(grace_seconds: float = 2.0) -> None:
+    """
+    Cancels the remaining background tasks and lets them handle it.
+
+    Args:
+        grace_seconds: How long to wait for tasks to run their cleanup
+    """
+    tasks = set(_tasks)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.wait(tasks, timeout=grace_seconds)
@@ -0,0 +1,162 @@
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+from app.database import get_supabase_client
+from app.services.project_stats import record_project_conflict
+
+# Columns returned by the alerts feed
+ALERT_COLUMNS = (
+    "id, project_id, activity_id, related_activity_ids, platform, "
+    "has_conflict, verdict, warning, created_at, read_at"
+)
+
+
+def save_conflict_verdict(
+    project_id: str,
+    activity_id,
+    platform: str,
+    conflict_result: dict
+) -> Optional[dict]:
+    """
+    Persists a Conflict Radar verdict in the conflict_alerts table.
+
+    Every verdict is stored (not only conflicts) so history can be audited
+    and replayed; the feed only serves rows with has_conflict set.
+    Failures are logged and swallowed so ingest never fails on them.
+
+    Args:
+        project_id (str): The project the activity belongs to
+        activity_id: ID of the analyzed activity
+        platform (str): Source platform of the activity
+        conflict_result (dict): Output of analyze_activity_for_conflicts
+
+    Returns:
+        dict: The stored alert row, or None if saving failed
+    """
+    related_ids = [
+        related_id
+        for related_id in conflict_result.get("context_activity_ids", [])
+        if related_id is not None and related_id != activity_id
+    ]
+
+    try:
+        supabase = get_supabase_client()
+        response = supabase.table("conflict_alerts").insert({
+            "project_id": int(project_id),
+            "activity_id": activity_id,
+            "related_activity_ids": related_ids,
+            "platform": platform,
+            "has_conflict": bool(conflict_result.get("has_conflict")),
+            "verdict": conflict_result.get("verdict", ""),
+            "warning": conflict_result.get("warning", ""),
+        }).execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        print(f"Failed to save conflict verdict for activity {activity_id}: {str(e)}")
+        return None
+
+
+def get_user_project_ids(user_id: str) -> List[int]:
+    """
+    Returns the IDs of all projects owned by a user.
+
+    Args:
+        user_id (str): The authenticated user's ID
+
+    Returns:
+        list: Project IDs
+    """
+    supabase = get_supabase_client()
+    response = supabase.table("projects").select("id").eq("user_id", user_id).execute()
+    return [row["id"] for row in response.data or []]
+
+
+def list_conflict_alerts(
+    project_ids: List[int],
+    limit: int,
+    after_id: Optional[int] = None,
+    unread_only: bool = False
+) -> List[dict]:
+    """
+    Fetches one page of conflict alerts, newest first.
+
+    Args:
+        project_ids (list): Projects to include
+        limit (int): Maximum number of rows
+        after_id (int, optional): Only return alerts older than this ID
+        unread_only (bool): Only return alerts not yet marked as read
+
+    Returns:
+        list: Alert rows
+    """
+    if not project_ids:
+        return []
+
+    supabase = get_supabase_client()
+    query = supabase.table("conflict_alerts").select(ALERT_COLUMNS).in_(
+        "project_id", project_ids
+    ).eq("has_conflict", True)
+    if unread_only:
+        query = query.is_("read_at", "null")
+    if after_id is not None:
+        query = query.lt("id", after_id)
+
+    response = query.order("id", desc=True).limit(limit).execute()
+    return response.data or []
+
+
+def count_unread_alerts(project_ids: List[int]) -> int:
+    """
+    Counts unread conflict alerts across projects.
+
+    Args:
+        project_ids (list): Projects to include
+
+    Returns:
+        int: Number of unread alerts
+    """
+    if not project_ids:
+        return 0
+
+    supabase = get_supabase_client()
+    response = supabase.table("conflict_alerts").select("id", count="exact").in_(
+        "project_id", project_ids
+    ).eq("has_conflict", True).is_("read_at", "null").limit(1).execute()
+    return response.count or 0
+
+
+def mark_alerts_read(
+    project_ids: List[int],
+    alert_ids: Optional[List[int]] = None,
+    up_to_id: Optional[int] = None
+) -> int:
+    """
+    Marks alerts as read and closes them on the project dashboard counters.
+
+    Args:
+        project_ids (list): Projects the caller owns (others are never touched)
+        alert_ids (list, optional): Specific alerts to mark
+        up_to_id (int, optional): Mark every alert with an ID up to this one
+
+    Returns:
+        int: Number of alerts that went from unread to read
+    """
+    if not project_ids or (not alert_ids and up_to_id is None):
+        return 0
+
+    supabase = get_supabase_client()
+    query = supabase.table("conflict_alerts").update({
+        "read_at": datetime.utcnow().isoformat()
+    }).in_("project_id", project_ids).eq("has_conflict", True).is_("read_at", "null")
+    if alert_ids:
+        query = query.in_("id", alert_ids)
+    if up_to_id is not None:
+        query = query.lte("id", up_to_id)
+
+    updated = query.execute().data or []
+
+    # Read conflicts no longer count as open on the dashboard
+    for project_id, count in Counter(row["project_id"] for row in updated).items():
+        record_project_conflict(str(project_id), -count)
+
+    return len(updated)
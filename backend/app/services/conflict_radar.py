@@ -3,7 +3,9 @@ import json
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
-from app.database import get_supabase_client
+from typing import Optional
+from app.services.project_digest import get_project_digest, render_digest
+from app.services.llm_scheduler import get_llm_scheduler, estimate_tokens, Priority
 
 # Load environment variables from .env file
 load_dotenv()
@@ -11,120 +13,154 @@ load_dotenv()
 # Get Gemini API key from environment variables
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# Validate that API key is present
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY must be set in the .env file")
+# Gemini 1.5 Flash model, created on first use so callers that bring their
+# own model (e.g. replay dry runs) don't need an API key
+_llm = None
 
-# Initialize Gemini 1.5 Flash model
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=GEMINI_API_KEY,
-    temperature=0.3,  # Lower temperature for more consistent conflict detection
-    convert_system_message_to_human=True
-)
 
+def get_conflict_llm() -> ChatGoogleGenerativeAI:
+    """
+    Returns the Gemini model used for conflict detection.
+    
+    Returns:
+        ChatGoogleGenerativeAI: The shared model instance
+        
+    Raises:
+        ValueError: If GEMINI_API_KEY is not set
+    """
+    global _llm
+    if _llm is None:
+        # Validate that API key is present
+        if not GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY must be set in the .env file")
+        _llm = ChatGoogleGenerativeAI(
+            model="gemini-1.5-flash",
+            google_api_key=GEMINI_API_KEY,
+            temperature=0.3,  # Lower temperature for more consistent conflict detection
+            convert_system_message_to_human=True
+        )
+    return _llm
 
-async def analyze_activity_for_conflicts(new_activity_text: str, project_id: str) -> dict:
+# Verdict returned when the model's answer can't be parsed (never cached)
+PARSE_ERROR_VERDICT = "Unable to analyze - JSON parsing error"
+
+
+def summarize_activity_text(platform: str, payload) -> str:
     """
-    Analyzes a new developer activity to detect potential conflicts with recent activities.
+    Creates the readable summary of an activity used as NEW ACTIVITY in the prompt.
     
-    This function acts as a 'conflict radar' by:
-    1. Fetching the last 5 activities for the specified project
-    2. Sending both the new activity and past activities to Gemini AI
-    3. Getting an AI analysis of potential conflicts
+    Args:
+        platform (str): Source platform (e.g. "GitHub")
+        payload: The raw webhook payload
+        
+    Returns:
+        str: A short, truncated text description of the activity
+    """
+    return f"{platform} activity: {json.dumps(payload)[:200]}"
+
+
+def build_conflict_messages(new_activity_text: str, context_text: str) -> list:
+    """
+    Builds the chat messages sent to the model for one conflict check.
     
     Args:
         new_activity_text (str): Description of the new developer activity
-        project_id (str): The ID of the project to check activities for
+        context_text (str): Rendered project-state digest
         
     Returns:
-        dict: A dictionary containing:
-            - 'has_conflict' (bool): Whether a conflict was detected
-            - 'verdict' (str): The AI's verdict message
-            - 'warning' (str, optional): Detailed warning if conflict detected
-            
-    Raises:
-        Exception: If there's an error fetching activities or analyzing conflicts
+        list: System and user messages
     """
-    try:
-        # Get Supabase client
-        supabase = get_supabase_client()
-        
-        # Fetch the last 5 activities for this project
-        # Ordered by creation date (most recent first)
-        response = supabase.table("activities").select("*").eq(
-            "project_id", project_id
-        ).order("created_at", desc=True).limit(5).execute()
-        
-        # Extract past activities data
-        past_activities = response.data if response.data else []
-        
-        # Format past activities into a readable string for the AI
-        past_activities_text = ""
-        if past_activities:
-            past_activities_text = "Recent activities:\n"
-            for idx, activity in enumerate(past_activities, 1):
-                platform = activity.get("platform", "Unknown")
-                content = activity.get("content", {})
-                created_at = activity.get("created_at", "Unknown time")
-                
-                # Extract relevant info from content (adjust based on your data structure)
-                activity_summary = json.dumps(content, indent=2) if isinstance(content, dict) else str(content)
-                
-                past_activities_text += f"\n{idx}. [{platform}] at {created_at}:\n{activity_summary[:200]}...\n"
-        else:
-            past_activities_text = "No recent activities found for this project."
-        
-        # Create the system message to set the AI's role as a Conflict Detector
-        system_prompt = SystemMessage(content="""
-        You are an expert Software Project Manager specializing in detecting conflicts 
-        in developer activities. Your job is to identify potential conflicts such as:
-        - Multiple developers working on the same file or feature
-        - Changes that might overwrite each other's work
-        - Contradictory implementation approaches
-        - Breaking changes that affect ongoing work
-        - Duplicate efforts on similar tasks
-        
-        Be thorough but not overly cautious. Only flag real potential conflicts.
-        """)
-        
-        # Create the user prompt with the activities to analyze
-        user_prompt = HumanMessage(content=f"""
-        Analyze this new developer activity for potential conflicts with recent activities.
-        
-        NEW ACTIVITY:
-        {new_activity_text}
-        
-        {past_activities_text}
-        
-        Question: Is this new developer activity conflicting with what was done recently?
-        
-        Respond in the following JSON format:
-        {{
-            "has_conflict": true or false,
-            "verdict": "Your verdict here",
-            "warning": "Detailed warning if conflict detected, or empty string if no conflict"
-        }}
-        
-        If there IS a conflict:
-        - Set has_conflict to true
-        - Provide a clear verdict explaining the conflict
-        - Give a detailed warning with actionable advice
-        
-        If there is NO conflict:
-        - Set has_conflict to false
-        - Set verdict to "No conflict"
-        - Set warning to empty string
-        
-        Only return the JSON, no additional text.
-        """)
-        
-        # Invoke the LLM with the messages
-        response = llm.invoke([system_prompt, user_prompt])
-        
-        # Extract the content from the response
-        content = response.content
+    # Create the system message to set the AI's role as a Conflict Detector
+    system_prompt = SystemMessage(content="""
+    You are an expert Software Project Manager specializing in detecting conflicts 
+    in developer activities. Your job is to identify potential conflicts such as:
+    - Multiple developers working on the same file or feature
+    - Changes that might overwrite each other's work
+    - Contradictory implementation approaches
+    - Breaking changes that affect ongoing work
+    - Duplicate efforts on similar tasks
+    
+    Be thorough but not overly cautious. Only flag real potential conflicts.
+    """)
+    
+    # Create the user prompt with the activities to analyze
+    user_prompt = HumanMessage(content=f"""
+    Analyze this new developer activity for potential conflicts with the current
+    state of the project (active branches, who is working where, open topics and
+    recent decisions).
+    
+    NEW ACTIVITY:
+    {new_activity_text}
+    
+    {context_text}
+    
+    Question: Is this new developer activity conflicting with what was done recently?
+    
+    Respond in the following JSON format:
+    {{
+        "has_conflict": true or false,
+        "verdict": "Your verdict here",
+        "warning": "Detailed warning if conflict detected, or empty string if no conflict"
+    }}
+    
+    If there IS a conflict:
+    - Set has_conflict to true
+    - Provide a clear verdict explaining the conflict
+    - Give a detailed warning with actionable advice
+    
+    If there is NO conflict:
+    - Set has_conflict to false
+    - Set verdict to "No conflict"
+    - Set warning to empty string
+    
+    Only return the JSON, no additional text.
+    """)
+    
+    return [system_prompt, user_prompt]
+
+
+async def evaluate_conflict(
+    new_activity_text: str,
+    digest: dict,
+    project_id: str,
+    model=None,
+    scheduler=None
+) -> dict:
+    """
+    Runs the detection pipeline for one activity against a project digest.
+    
+    This is the part of the Conflict Radar that doesn't touch the database,
+    so it can also be driven with historical state (see app.tools.replay_conflicts).
+    
+    Args:
+        new_activity_text (str): Description of the new developer activity
+        digest (dict): Project-state digest from before this activity
+        project_id (str): The project, used as the fair-queueing tenant
+        model: Chat model to use (defaults to get_conflict_llm())
+        scheduler: LLM scheduler to go through (defaults to the process-wide one)
         
+    Returns:
+        dict: 'has_conflict', 'verdict', 'warning' and 'context_activity_ids'
+    """
+    model = model or get_conflict_llm()
+    scheduler = scheduler or get_llm_scheduler()
+    context_activity_ids = list(digest.get("recent_activity_ids", []))
+    
+    messages = build_conflict_messages(new_activity_text, render_digest(digest))
+    
+    # Invoke the LLM through the scheduler (background: runs per webhook,
+    # fair-queued per project so one busy repository can't starve others)
+    response = await scheduler.run(
+        lambda: model.ainvoke(messages),
+        priority=Priority.BACKGROUND,
+        tenant=str(project_id),
+        estimated_tokens=estimate_tokens(messages),
+    )
+    
+    # Extract the content from the response
+    content = response.content
+    
+    try:
         # Parse the JSON response
         # Remove markdown code blocks if present
         if "```json" in content:
@@ -134,15 +170,53 @@ async def analyze_activity_for_conflicts(new_activity_text: str, project_id: str
         
         result = json.loads(content)
         
-        return result
-        
     except json.JSONDecodeError as e:
         # Fallback if JSON parsing fails
-        return {
+        result = {
             "has_conflict": False,
-            "verdict": "Unable to analyze - JSON parsing error",
+            "verdict": PARSE_ERROR_VERDICT,
             "warning": ""
         }
+    
+    result["context_activity_ids"] = context_activity_ids
+    return result
+
+
+async def analyze_activity_for_conflicts(
+    new_activity_text: str,
+    project_id: str,
+    digest: Optional[dict] = None
+) -> dict:
+    """
+    Analyzes a new developer activity to detect potential conflicts with recent activities.
+    
+    This function acts as a 'conflict radar' by:
+    1. Taking the project's rolling state digest (branches, who works on
+       which paths, open topics, decisions) as fixed-size context
+    2. Sending both the new activity and the digest to Gemini AI
+    3. Getting an AI analysis of potential conflicts
+    
+    Args:
+        new_activity_text (str): Description of the new developer activity
+        project_id (str): The ID of the project to check activities for
+        digest (dict, optional): Digest from before the activity; loaded if omitted
+        
+    Returns:
+        dict: A dictionary containing:
+            - 'has_conflict' (bool): Whether a conflict was detected
+            - 'verdict' (str): The AI's verdict message
+            - 'warning' (str, optional): Detailed warning if conflict detected
+            - 'context_activity_ids' (list): IDs of the latest activities in the digest
+            
+    Raises:
+        Exception: If there's an error fetching the digest or analyzing conflicts
+    """
+    try:
+        if digest is None:
+            digest = await get_project_digest(project_id)
+        
+        return await evaluate_conflict(new_activity_text, digest, project_id)
+        
     except Exception as e:
         # Handle any other errors
-        raise Exception(f"Error analyzing activity for conflicts: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error analyzing activity for conflicts: {str(e)}")
@@ -0,0 +1,246 @@
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional
+from app.database import get_supabase_client
+from app.services.ai_services import summarize_project, generate_initial_tasks
+from app.services.background import spawn
+from app.services.llm_scheduler import Priority
+
+# Enrichment job states stored in projects.ai_status
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_COMPLETE = "complete"
+STATUS_FAILED = "failed"
+
+# Attempts per job before it is marked failed
+ENRICHMENT_MAX_ATTEMPTS = int(os.getenv("ENRICHMENT_MAX_ATTEMPTS", "3"))
+
+# Delay before the first retry (doubles with every further attempt, seconds)
+ENRICHMENT_RETRY_DELAY = float(os.getenv("ENRICHMENT_RETRY_DELAY", "5"))
+
+# Unfinished jobs untouched for this long are assumed lost with their worker (seconds)
+ENRICHMENT_STALE_SECONDS = float(os.getenv("ENRICHMENT_STALE_SECONDS", "300"))
+
+# How often each worker looks for lost jobs (seconds)
+ENRICHMENT_SWEEP_SECONDS = float(os.getenv("ENRICHMENT_SWEEP_SECONDS", "60"))
+
+# ai_updated_at of a job handed back on shutdown: stale at once, so any
+# worker's next sweep claims it
+RELEASED_AT = datetime(1970, 1, 1).isoformat()
+
+# Projects with an enrichment job running in this process
+_active = set()
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _update_project(project_id: int, **fields) -> None:
+    supabase = get_supabase_client()
+    supabase.table("projects").update({
+        "ai_updated_at": _now(),
+        **fields,
+    }).eq("id", project_id).execute()
+
+
+async def _heartbeat(project_id: int) -> None:
+    # Keeps a long-running job (e.g. queued behind interactive LLM calls)
+    # from looking lost to other workers' sweeps
+    while True:
+        await asyncio.sleep(ENRICHMENT_STALE_SECONDS / 3)
+        await asyncio.to_thread(_update_project, project_id)
+
+
+def enqueue_enrichment(project_id: int, description: str, tenant: str) -> bool:
+    """
+    Starts the AI enrichment job for a project in the background.
+
+    Args:
+        project_id (int): The project to enrich
+        description (str): The project description the AI content is based on
+        tenant (str): Fair-queueing key for the LLM scheduler (the owner's user ID)
+
+    Returns:
+        bool: False if a job for the project is already running in this process
+    """
+    if project_id in _active:
+        return False
+    _active.add(project_id)
+    spawn(_run_enrichment(project_id, description, tenant), name=f"enrichment-{project_id}")
+    return True
+
+
+def active_enrichment_count() -> int:
+    """Returns how many enrichment jobs are running in this process."""
+    return len(_active)
+
+
+async def _run_enrichment(project_id: int, description: str, tenant: str) -> None:
+    heartbeat = asyncio.ensure_future(_heartbeat(project_id))
+    try:
+        await _attempt_enrichment(project_id, description, tenant)
+    except asyncio.CancelledError:
+        # Shutting down (mid-call or during a retry delay): hand the job
+        # back, claimable by any worker at once
+        _update_project(project_id, ai_status=STATUS_PENDING, ai_updated_at=RELEASED_AT)
+        raise
+    finally:
+        heartbeat.cancel()
+        _active.discard(project_id)
+
+
+async def _attempt_enrichment(project_id: int, description: str, tenant: str) -> None:
+    for attempt in range(1, ENRICHMENT_MAX_ATTEMPTS + 1):
+        _update_project(project_id, ai_status=STATUS_RUNNING, ai_attempts=attempt)
+        try:
+            # Unparseable answers raise, so they are retried like any failure
+            ai_summary, ai_tasks = await asyncio.gather(
+                summarize_project(
+                    description, tenant=tenant, priority=Priority.BACKGROUND, fallback=False
+                ),
+                generate_initial_tasks(
+                    description, tenant=tenant, priority=Priority.BACKGROUND, fallback=False
+                ),
+            )
+        except Exception as e:
+            print(f"Enrichment attempt {attempt} for project {project_id} failed: {str(e)}")
+            if attempt == ENRICHMENT_MAX_ATTEMPTS:
+                _update_project(project_id, ai_status=STATUS_FAILED, ai_error=str(e))
+                return
+            _update_project(project_id, ai_status=STATUS_PENDING, ai_error=str(e))
+            await asyncio.sleep(ENRICHMENT_RETRY_DELAY * 2 ** (attempt - 1))
+            continue
+
+        _update_project(
+            project_id,
+            ai_summary=ai_summary,
+            tasks=ai_tasks,
+            ai_status=STATUS_COMPLETE,
+            ai_error=None,
+        )
+        return
+
+
+def get_enrichment_status(project_id: int, user_id: str) -> Optional[dict]:
+    """
+    Returns the enrichment state of one of the user's projects.
+
+    Args:
+        project_id (int): The project ID
+        user_id (str): The owner's user ID
+
+    Returns:
+        dict: Status, attempts, last error and (once complete) the AI content,
+              or None if the project doesn't exist or isn't the user's
+    """
+    supabase = get_supabase_client()
+    response = supabase.table("projects").select(
+        "id, ai_status, ai_attempts, ai_error, ai_updated_at, ai_summary, tasks"
+    ).eq("id", project_id).eq("user_id", user_id).limit(1).execute()
+    if not response.data:
+        return None
+
+    row = response.data[0]
+    complete = row.get("ai_status") == STATUS_COMPLETE
+    return {
+        "project_id": row["id"],
+        "status": row.get("ai_status"),
+        "attempts": row.get("ai_attempts"),
+        "error": row.get("ai_error"),
+        "updated_at": row.get("ai_updated_at"),
+        "ai_summary": row.get("ai_summary") if complete else None,
+        "tasks": row.get("tasks") if complete else None,
+    }
+
+
+def retry_enrichment(project_id: int, user_id: str) -> Optional[str]:
+    """
+    Re-queues a failed enrichment job.
+
+    Args:
+        project_id (int): The project ID
+        user_id (str): The owner's user ID
+
+    Returns:
+        str: The project's status before the call ('failed' if it was re-queued),
+             or None if the project doesn't exist or isn't the user's
+    """
+    supabase = get_supabase_client()
+    response = supabase.table("projects").select("id, description, ai_status").eq(
+        "id", project_id
+    ).eq("user_id", user_id).limit(1).execute()
+    if not response.data:
+        return None
+
+    row = response.data[0]
+    if row.get("ai_status") == STATUS_FAILED:
+        _update_project(project_id, ai_status=STATUS_PENDING, ai_attempts=0, ai_error=None)
+        enqueue_enrichment(project_id, row["description"], str(user_id))
+    return row.get("ai_status")
+
+
+def _claim_unfinished_enrichments() -> List[dict]:
+    # Blocking I/O only (runs in a worker thread): find lost jobs and claim
+    # each with a conditional update; starting them is left to the event loop
+    supabase = get_supabase_client()
+    cutoff = (datetime.utcnow() - timedelta(seconds=ENRICHMENT_STALE_SECONDS)).isoformat()
+    response = supabase.table("projects").select(
+        "id, description, user_id, ai_updated_at"
+    ).in_("ai_status", [STATUS_PENDING, STATUS_RUNNING]).lt("ai_updated_at", cutoff).execute()
+
+    claimed = []
+    for row in response.data or []:
+        if row["id"] in _active:
+            continue  # Still being handed back by this process
+        claim = supabase.table("projects").update({
+            "ai_status": STATUS_PENDING,
+            "ai_updated_at": _now(),
+        }).eq("id", row["id"]).eq("ai_updated_at", row["ai_updated_at"]).execute()
+        if claim.data:
+            claimed.append(row)
+    return claimed
+
+
+async def requeue_unfinished_enrichments() -> int:
+    """
+    Restarts enrichment jobs left unfinished by a stopped worker.
+
+    A job counts as lost when it has been pending or running without an
+    update for ENRICHMENT_STALE_SECONDS (running jobs refresh it while they
+    work), or was handed back by a worker shutting down. Each job is claimed
+    with a conditional update, so several workers sweeping together don't
+    run it twice. The database work runs in a thread; claimed jobs are
+    started on the event loop.
+
+    Returns:
+        int: Number of jobs restarted in this process
+    """
+    claimed = await asyncio.to_thread(_claim_unfinished_enrichments)
+    restarted = 0
+    for row in claimed:
+        if enqueue_enrichment(row["id"], row["description"], str(row["user_id"])):
+            restarted += 1
+    return restarted
+
+
+async def sweep_unfinished_enrichments(interval_seconds: float = ENRICHMENT_SWEEP_SECONDS) -> None:
+    """
+    Runs requeue_unfinished_enrichments every `interval_seconds` until cancelled.
+
+    Every worker runs the sweep, so jobs handed back by a worker that shut
+    down during a rolling deploy are resumed by the workers still running.
+    The first sweep runs after one interval (warm-up does the initial one).
+
+    Args:
+        interval_seconds (float): Delay between sweeps
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            restarted = await requeue_unfinished_enrichments()
+            if restarted:
+                print(f"Restarted {restarted} unfinished enrichment jobs")
+        except Exception as e:
+            print(f"Enrichment sweep failed: {str(e)}")
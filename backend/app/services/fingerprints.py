@@ -0,0 +1,153 @@
+import re
+import json
+import random
+import hashlib
+from typing import List
+
+# Keys that differ between copies of the same message (delivery and message
+# IDs, timestamps, avatars); everything else, numbers included, is content
+VOLATILE_KEYS = {
+    "id", "node_id", "event_id", "client_msg_id", "nonce", "delivery", "installation",
+    "ts", "event_ts", "thread_ts", "event_time", "timestamp",
+    "created_at", "updated_at", "pushed_at", "edited_timestamp",
+    "avatar", "avatar_url", "gravatar_id",
+}
+
+# Nested objects reduced to the one field that identifies them
+IDENTITY_FIELDS = {
+    "repository": "full_name",
+    "organization": "login",
+    "sender": "login",
+    "owner": "login",
+    "author": "username",
+    "pusher": "name",
+    "user": "login",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_#./-]+")
+
+# MinHash parameters: 64 permutations split into 16 LSH bands of 4 rows
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)  # Fixed seed: signatures must agree across workers
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+def _normalize_value(value, key: str = ""):
+    if isinstance(value, dict):
+        identity = IDENTITY_FIELDS.get(key)
+        if identity and identity in value:
+            return _normalize_value(value[identity])
+        return {
+            k: _normalize_value(v, k)
+            for k, v in sorted(value.items())
+            if k not in VOLATILE_KEYS
+        }
+    if isinstance(value, list):
+        return [_normalize_value(item, key) for item in value]
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    return " ".join(str(value).lower().split())
+
+
+def normalize_activity(platform: str, content) -> str:
+    """
+    Canonical text of an activity, stable across redeliveries and bot repeats.
+
+    Delivery and message IDs and timestamps are dropped, nested
+    users/repositories are reduced to their names, text is lower-cased with
+    whitespace collapsed, and keys are sorted, so two events that say the
+    same thing normalize alike. Numbers (PR numbers, versions, counts) are
+    kept: "merge PR 12" and "merge PR 13" are different events.
+
+    Args:
+        platform (str): Source platform (e.g. "GitHub")
+        content: The activity payload
+
+    Returns:
+        str: Canonical JSON text
+    """
+    return json.dumps(
+        {"platform": platform, "content": _normalize_value(content)},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def activity_fingerprint(platform: str, content) -> str:
+    """
+    Returns the SHA-256 fingerprint of an activity's normalized fields.
+
+    Args:
+        platform (str): Source platform
+        content: The activity payload
+
+    Returns:
+        str: Hex digest of normalize_activity(platform, content)
+    """
+    return hashlib.sha256(normalize_activity(platform, content).encode("utf-8")).hexdigest()
+
+
+def combine_fingerprints(fingerprints: List[str]) -> str:
+    """Returns one fingerprint for an ordered list of fingerprints."""
+    return hashlib.sha256("\n".join(fingerprints).encode("utf-8")).hexdigest()
+
+
+def _shingles(text: str) -> set:
+    tokens = TOKEN_PATTERN.findall(text)
+    if len(tokens) < 3:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2)}
+
+
+def minhash_signature(text: str) -> List[int]:
+    """
+    Computes the MinHash signature of a text's word 3-gram shingles.
+
+    The share of equal positions in two signatures estimates the Jaccard
+    similarity of the texts.
+
+    Args:
+        text (str): Normalized activity text
+
+    Returns:
+        list: MINHASH_PERMUTATIONS integers
+    """
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in _shingles(text)
+    ]
+    return [
+        min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def minhash_bands(signature: List[int]) -> List[str]:
+    """
+    Splits a signature into LSH band keys; similar texts share at least one.
+
+    Args:
+        signature (list): Output of minhash_signature
+
+    Returns:
+        list: MINHASH_BANDS short hex keys
+    """
+    rows = len(signature) // MINHASH_BANDS
+    return [
+        hashlib.blake2b(
+            f"{band}:{signature[band * rows:(band + 1) * rows]}".encode("utf-8"), digest_size=8
+        ).hexdigest()
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def estimate_similarity(first: List[int], second: List[int]) -> float:
+    """Estimates the Jaccard similarity of two texts from their signatures."""
+    if not first or len(first) != len(second):
+        return 0.0
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
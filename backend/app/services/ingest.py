@@ -0,0 +1,225 @@
+import os
+import asyncio
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import List
+from app.adapters import NormalizedEvent
+from app.cache import get_cache
+from app.database import get_supabase_client
+from app.services.background import spawn
+from app.services.conflict_radar import summarize_activity_text
+from app.services.conflict_alerts import save_conflict_verdict
+from app.services.project_digest import update_project_digest
+from app.services.project_stats import record_project_activities, record_project_conflict
+from app.services.fingerprints import activity_fingerprint, combine_fingerprints, normalize_activity
+from app.services.verdict_cache import get_verdict_cache
+
+# How long the resolved project ID is reused across webhooks (seconds)
+PROJECT_LOOKUP_TTL = 30.0
+
+# How long delivery IDs are remembered to drop redelivered events (seconds)
+INGEST_DEDUP_TTL = float(os.getenv("INGEST_DEDUP_TTL", "86400"))
+
+
+async def resolve_project_id(supabase) -> str:
+    """
+    Returns the project ID webhook events are attached to.
+
+    The lookup is cached (and single-flighted) so a burst of webhooks
+    doesn't issue one projects query per event.
+
+    Args:
+        supabase: The Supabase client
+
+    Returns:
+        str: The project ID
+    """
+    async def load() -> str:
+        # Fetch the first project ID from the database (or use a dummy ID)
+        # TODO: Replace this with actual project_id from webhook payload or context
+        projects_response = supabase.table("projects").select("id").limit(1).execute()
+        if projects_response.data and len(projects_response.data) > 0:
+            return str(projects_response.data[0]["id"])
+        return "1"  # Fallback dummy ID if no projects exist
+
+    return await get_cache().get_or_set(
+        "webhooks:default_project_id", load, ttl=PROJECT_LOOKUP_TTL
+    )
+
+
+def _dedup_cache_key(event: NormalizedEvent) -> str:
+    return f"ingest:seen:{event.platform}:{event.dedup_key}"
+
+
+async def _claim_delivery(event: NormalizedEvent) -> bool:
+    # First sighting of a delivery ID wins; events without one always pass
+    if event.dedup_key is None:
+        return True
+    return await get_cache().aadd(_dedup_cache_key(event), True, ttl=INGEST_DEDUP_TTL)
+
+
+async def _release_deliveries(events: List[NormalizedEvent]) -> None:
+    # Forget deliveries that weren't saved so the sender's retry is accepted
+    for event in events:
+        if event.dedup_key is not None:
+            await get_cache().adelete(_dedup_cache_key(event))
+
+
+async def _analyze_project(project_id: str, rows: List[dict], events: List[NormalizedEvent]) -> dict:
+    """
+    Folds a project's new activities into its digest and runs one conflict check.
+
+    The events are compared against the project state from before them; the
+    verdict is filed under the newest activity, with the rest recorded as
+    involved activities. Repeated or near-identical events reuse a cached
+    verdict (see app.services.verdict_cache).
+    """
+    previous_digest, _ = await update_project_digest(project_id, rows)
+
+    if len(events) == 1:
+        activity_text = summarize_activity_text(events[0].platform, events[0].content)
+    else:
+        activity_text = f"Batch of {len(events)} events:\n" + "\n".join(
+            summarize_activity_text(event.platform, event.content) for event in events
+        )
+    conflict_result = await get_verdict_cache().evaluate(
+        combine_fingerprints([activity_fingerprint(event.platform, event.content) for event in events]),
+        activity_text,
+        "\n".join(normalize_activity(event.platform, event.content) for event in events),
+        previous_digest,
+        project_id,
+    )
+
+    involved = [row.get("id") for row in rows[:-1]]
+    save_conflict_verdict(project_id, rows[-1].get("id"), events[-1].platform, {
+        **conflict_result,
+        "context_activity_ids": involved + conflict_result.get("context_activity_ids", [])
+    })
+    if conflict_result.get("has_conflict"):
+        record_project_conflict(project_id)
+
+    return conflict_result
+
+
+def _conflict_check(verdict) -> dict:
+    if isinstance(verdict, Exception):
+        return {"has_conflict": False, "verdict": f"Analysis failed: {str(verdict)}"}
+
+    conflict_check = {
+        "has_conflict": verdict.get("has_conflict", False),
+        "verdict": verdict.get("verdict", "No analysis")
+    }
+    if verdict.get("has_conflict"):
+        conflict_check["warning"] = verdict.get("warning", "")
+    return conflict_check
+
+
+async def _analyze_projects(grouped: list, events: List[NormalizedEvent]) -> list:
+    # Conflict analysis: one call per project, all projects concurrently
+    verdicts = await asyncio.gather(
+        *(
+            _analyze_project(
+                project_id,
+                [row for _, row in entries],
+                [events[index] for index, _ in entries],
+            )
+            for project_id, entries in grouped
+        ),
+        return_exceptions=True
+    )
+    for (project_id, _), verdict in zip(grouped, verdicts):
+        if isinstance(verdict, Exception):
+            print(f"Conflict analysis failed for project {project_id}: {str(verdict)}")
+    return verdicts
+
+
+async def ingest_events(events: List[NormalizedEvent], defer_analysis: bool = False) -> List[dict]:
+    """
+    Shared pipeline behind every webhook route, for one event or a batch.
+
+    1. Drops redelivered events (by platform delivery ID)
+    2. Routes each event to its project
+    3. Saves all events with a single bulk insert
+    4. Updates each project's dashboard counters in one round trip
+    5. Runs one digest update and one conflict analysis per project, concurrently
+
+    Args:
+        events (list): Normalized events, oldest first
+        defer_analysis (bool): Return once the events are stored and run
+                               step 5 as a background task
+
+    Returns:
+        list: One outcome per event, in order: 'status' ("success" or
+              "duplicate"), plus 'activity_id', 'project_id' and
+              'conflict_check' for saved events ('conflict_check' is None
+              when the analysis was deferred)
+
+    Raises:
+        Exception: If saving to the database fails
+    """
+    outcomes = [None] * len(events)
+    accepted = []
+    for index, event in enumerate(events):
+        if await _claim_delivery(event):
+            accepted.append(index)
+        else:
+            outcomes[index] = {"status": "duplicate", "dedup_key": event.dedup_key}
+
+    if not accepted:
+        return outcomes
+
+    accepted_events = [events[index] for index in accepted]
+    try:
+        supabase = get_supabase_client()
+
+        # Route every event to its project
+        project_ids = [await resolve_project_id(supabase) for _ in accepted_events]
+
+        # One bulk insert for everything accepted
+        created_at = datetime.utcnow().isoformat()
+        response = supabase.table("activities").insert([
+            {
+                "platform": event.platform,
+                "content": event.content,
+                "project_id": project_id,
+                "created_at": created_at
+            }
+            for event, project_id in zip(accepted_events, project_ids)
+        ]).execute()
+
+        if not response.data or len(response.data) != len(accepted_events):
+            raise Exception("Failed to save activities")
+    except Exception:
+        await _release_deliveries(accepted_events)
+        raise
+
+    by_project = defaultdict(list)
+    for index, project_id, row in zip(accepted, project_ids, response.data):
+        by_project[project_id].append((index, row))
+
+    # Counters: one round trip per project
+    for project_id, entries in by_project.items():
+        record_project_activities(
+            project_id,
+            dict(Counter(events[index].platform for index, _ in entries)),
+            created_at
+        )
+
+    grouped = list(by_project.items())
+    if defer_analysis:
+        spawn(_analyze_projects(grouped, events), name="ingest-analysis")
+        verdicts = [None] * len(grouped)
+    else:
+        verdicts = await _analyze_projects(grouped, events)
+
+    for (project_id, entries), verdict in zip(grouped, verdicts):
+        conflict_check = _conflict_check(verdict) if verdict is not None else None
+        for index, row in entries:
+            outcomes[index] = {
+                "status": "success",
+                "activity_id": row.get("id"),
+                "project_id": project_id,
+                "conflict_check": conflict_check
+            }
+
+    return outcomes
@@ -0,0 +1,356 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Global Gemini budget shared by every LLM call in this process
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "15"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Length of the sliding window the budgets apply to (seconds)
+BUDGET_WINDOW_SECONDS = 60.0
+
+# Number of recent queue-wait samples kept per priority class for percentiles
+WAIT_SAMPLE_SIZE = 1000
+
+
+class Priority(IntEnum):
+    """
+    Priority classes for LLM work.
+
+    Lower values are served first: a queued interactive request always
+    goes before any queued background request.
+    """
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+def estimate_tokens(messages: list) -> int:
+    """
+    Roughly estimates the prompt size of a list of chat messages.
+
+    Uses the common ~4 characters per token heuristic, which is good enough
+    for budgeting before the real usage is known.
+
+    Args:
+        messages (list): The LangChain messages that will be sent to the model
+
+    Returns:
+        int: Estimated number of tokens (at least 1)
+    """
+    characters = sum(len(str(getattr(message, "content", message))) for message in messages)
+    return characters // 4 + 1
+
+
+class _Ticket:
+    """A queued LLM request waiting for a slot."""
+
+    __slots__ = ("priority", "tenant", "tokens", "start_tag", "finish_tag",
+                 "seq", "future", "enqueued_at", "reservation")
+
+    def __init__(self, priority, tenant, tokens, start_tag, finish_tag, seq, future):
+        self.priority = priority
+        self.tenant = tenant
+        self.tokens = tokens
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.reservation = None  # [timestamp, tokens] entry in the TPM window
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.finish_tag, self.seq) < (other.finish_tag, other.seq)
+
+
+class LLMScheduler:
+    """
+    Priority- and tenant-aware scheduler in front of all LLM calls.
+
+    Requests are grouped into priority classes (interactive before
+    background). Inside a class, tenants (a user or a project) share
+    capacity through weighted fair queueing, so one noisy repository
+    cannot starve everyone else. Dispatch is additionally gated by a
+    global concurrency limit and by requests-per-minute and
+    tokens-per-minute budgets over a sliding window.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        window_seconds: float = BUDGET_WINDOW_SECONDS,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.window_seconds = window_seconds
+
+        # One heap of tickets per priority class, ordered by WFQ finish tag
+        self._queues: Dict[Priority, List[_Ticket]] = {p: [] for p in Priority}
+        self._virtual_time: Dict[Priority, float] = {p: 0.0 for p in Priority}
+        self._tenant_finish: Dict[Priority, Dict[str, float]] = {p: {} for p in Priority}
+        self._weights: Dict[str, float] = {}
+        self._seq = itertools.count()
+
+        # Sliding-window budget accounting
+        self._request_times: deque = deque()
+        self._token_events: deque = deque()
+        self._window_tokens = 0
+
+        self._in_flight = 0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        # Metrics
+        self._wait_samples: Dict[Priority, deque] = {
+            p: deque(maxlen=WAIT_SAMPLE_SIZE) for p in Priority
+        }
+        self._completed: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._failed: Dict[Priority, int] = {p: 0 for p in Priority}
+
+    def set_tenant_weight(self, tenant: str, weight: float) -> None:
+        """
+        Sets the fair-queueing weight of a tenant (default 1.0).
+
+        A tenant with weight 2.0 gets twice the share of a tenant with
+        weight 1.0 when both have queued work in the same priority class.
+        """
+        if weight <= 0:
+            raise ValueError("Tenant weight must be positive")
+        self._weights[tenant] = weight
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        priority: Priority = Priority.BACKGROUND,
+        tenant: str = "default",
+        estimated_tokens: int = 1,
+    ) -> Any:
+        """
+        Waits for a slot and then runs an LLM call.
+
+        Args:
+            call: Zero-argument callable returning the awaitable LLM call
+            priority: Priority class of the request
+            tenant: Fair-queueing key (user ID or project ID)
+            estimated_tokens: Expected token usage, counted against the budget
+
+        Returns:
+            Any: Whatever the awaited call returns
+        """
+        ticket = self._enqueue(priority, str(tenant), max(1, estimated_tokens))
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            # The slot may have been granted just before we were cancelled
+            if ticket.future.done() and not ticket.future.cancelled():
+                self._release()
+            raise
+
+        try:
+            result = await call()
+        except BaseException:
+            self._failed[priority] += 1
+            self._release()
+            raise
+
+        self._completed[priority] += 1
+        self._reconcile_tokens(ticket, result)
+        self._release()
+        return result
+
+    def stats(self) -> dict:
+        """
+        Returns scheduler metrics, including queue wait time per priority class.
+
+        Returns:
+            dict: Queue depths, wait-time percentiles (ms), budget usage and limits
+        """
+        self._expire_window(time.monotonic())
+
+        priorities = {}
+        for priority in Priority:
+            samples = sorted(self._wait_samples[priority])
+            priorities[priority.name.lower()] = {
+                "queued": sum(1 for t in self._queues[priority] if not t.future.done()),
+                "completed": self._completed[priority],
+                "failed": self._failed[priority],
+                "queue_wait_ms": {
+                    "avg": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+                    "p50": round(_percentile(samples, 0.50) * 1000, 2),
+                    "p95": round(_percentile(samples, 0.95) * 1000, 2),
+                    "max": round(samples[-1] * 1000, 2) if samples else 0.0,
+                },
+            }
+
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "requests_in_window": len(self._request_times),
+            "tokens_in_window": self._window_tokens,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "priorities": priorities,
+        }
+
+    def _enqueue(self, priority: Priority, tenant: str, tokens: int) -> _Ticket:
+        weight = self._weights.get(tenant, 1.0)
+        finish_times = self._tenant_finish[priority]
+
+        # WFQ tags: a tenant's next request starts after its previous one finishes
+        start_tag = max(self._virtual_time[priority], finish_times.get(tenant, 0.0))
+        finish_tag = start_tag + tokens / weight
+        finish_times[tenant] = finish_tag
+
+        ticket = _Ticket(
+            priority=priority,
+            tenant=tenant,
+            tokens=tokens,
+            start_tag=start_tag,
+            finish_tag=finish_tag,
+            seq=next(self._seq),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._queues[priority], ticket)
+        self._dispatch()
+        return ticket
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        # Strict priority between classes, finish-tag order within a class
+        for priority in Priority:
+            queue = self._queues[priority]
+            while queue and queue[0].future.done():
+                # Drop tickets whose waiters were cancelled
+                heapq.heappop(queue)
+            if queue:
+                return queue[0]
+        return None
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        self._expire_window(now)
+
+        while self._in_flight < self.max_concurrency:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+
+            wait = self._budget_wait(ticket.tokens, now)
+            if wait > 0:
+                self._schedule_wakeup(wait)
+                return
+
+            heapq.heappop(self._queues[ticket.priority])
+            self._virtual_time[ticket.priority] = ticket.start_tag
+            self._prune_tenants(ticket.priority)
+
+            self._request_times.append(now)
+            ticket.reservation = [now, ticket.tokens]
+            self._token_events.append(ticket.reservation)
+            self._window_tokens += ticket.tokens
+            self._in_flight += 1
+
+            self._wait_samples[ticket.priority].append(now - ticket.enqueued_at)
+            ticket.future.set_result(None)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _budget_wait(self, tokens: int, now: float) -> float:
+        """Seconds until a request of this size fits in both budgets."""
+        wait = 0.0
+
+        if len(self._request_times) >= self.requests_per_minute:
+            index = len(self._request_times) - self.requests_per_minute
+            wait = max(wait, self._request_times[index] + self.window_seconds - now)
+
+        # A single oversized request is let through once the window is empty
+        excess = self._window_tokens + tokens - self.tokens_per_minute
+        if excess > 0 and self._token_events:
+            freed = 0
+            for timestamp, used in self._token_events:
+                freed += used
+                if freed >= excess or freed >= self._window_tokens:
+                    wait = max(wait, timestamp + self.window_seconds - now)
+                    break
+
+        return wait
+
+    def _expire_window(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._request_times and self._request_times[0] <= cutoff:
+            self._request_times.popleft()
+        while self._token_events and self._token_events[0][0] <= cutoff:
+            _, used = self._token_events.popleft()
+            self._window_tokens -= used
+
+    def _reconcile_tokens(self, ticket: _Ticket, result: Any) -> None:
+        # Replace the estimate with the real usage when the model reports it.
+        # The reservation is corrected in place (never a negative entry), so
+        # the window total can't drop below what was actually used
+        usage = getattr(result, "usage_metadata", None) or {}
+        actual = usage.get("total_tokens") if isinstance(usage, dict) else None
+        reservation = ticket.reservation
+        if not actual or reservation is None:
+            return
+
+        # Still inside the window (expiry pops entries oldest first)
+        now = time.monotonic()
+        self._expire_window(now)
+        if reservation[0] > now - self.window_seconds:
+            actual = max(0, int(actual))
+            self._window_tokens += actual - reservation[1]
+            reservation[1] = actual
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        loop = asyncio.get_running_loop()
+        self._wakeup = loop.call_later(delay, self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup = None
+        self._dispatch()
+
+    def _prune_tenants(self, priority: Priority) -> None:
+        # Tenants whose last finish tag is behind virtual time carry no state
+        finish_times = self._tenant_finish[priority]
+        if len(finish_times) > 1024:
+            virtual_time = self._virtual_time[priority]
+            self._tenant_finish[priority] = {
+                tenant: tag for tenant, tag in finish_times.items() if tag > virtual_time
+            }
+
+
+def _percentile(sorted_samples: list, fraction: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+# Process-wide scheduler shared by all AI services
+llm_scheduler = LLMScheduler()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Returns the process-wide LLM scheduler.
+
+    Returns:
+        LLMScheduler: The scheduler instance
+    """
+    return llm_scheduler
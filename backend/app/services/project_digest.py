@@ -0,0 +1,417 @@
+import os
+import re
+import copy
+import asyncio
+import weakref
+from datetime import datetime
+from typing import List, Optional, Tuple
+from langchain_core.messages import HumanMessage, SystemMessage
+from app.database import get_supabase_client, is_unique_violation
+from app.services.background import spawn
+from app.services.fingerprints import activity_fingerprint
+from app.services.llm_scheduler import get_llm_scheduler, estimate_tokens, Priority
+
+# Size bounds that keep the digest (and the conflict prompt) fixed-size
+MAX_BRANCHES = 10
+MAX_PATHS = 30
+MAX_TOPICS = 10
+MAX_DECISIONS = 10
+MAX_PATHS_PER_ACTIVITY = 20
+MAX_TEXT_LENGTH = 160
+RECENT_ACTIVITY_IDS = 5
+
+# Re-summarize the digest with the LLM after this many new activities
+DIGEST_RESUMMARIZE_EVERY = int(os.getenv("DIGEST_RESUMMARIZE_EVERY", "20"))
+
+# Activities replayed to build a digest for a project that doesn't have one
+BOOTSTRAP_ACTIVITIES = 20
+
+# Read-modify-write attempts when other workers keep updating the same digest
+DIGEST_SAVE_ATTEMPTS = 5
+
+# Messages that record a decision rather than just discussion
+DECISION_PATTERN = re.compile(
+    r"\b(decided|decision|we will|we'll|let's go with|lets go with|agreed|going with|switching to)\b",
+    re.IGNORECASE,
+)
+
+# One lock per project so this process's events don't race each other; the
+# version check in _save_digest covers other workers
+_project_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# Projects whose summary refresh is already running in this process
+_resummarizing = set()
+
+
+def empty_digest() -> dict:
+    """
+    Returns the digest of a project with no activity yet.
+
+    Returns:
+        dict: A digest with every section empty
+    """
+    return {
+        "summary": "",
+        "branches": [],
+        "paths": [],
+        "topics": [],
+        "decisions": [],
+        "recent_activity_ids": [],
+        "recent_fingerprints": [],
+        "activity_count": 0,
+        "since_summary": 0,
+    }
+
+
+def _clip(text) -> str:
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= MAX_TEXT_LENGTH else text[: MAX_TEXT_LENGTH - 3] + "..."
+
+
+def _push(entries: list, entry: dict, key: str, limit: int) -> list:
+    # Most recent first; an entry with the same key moves to the front
+    kept = [existing for existing in entries if existing.get(key) != entry.get(key)]
+    return [entry] + kept[: limit - 1]
+
+
+def _add_topic(digest: dict, key: Optional[str], text: str, actor: str, at: str) -> None:
+    entry = {"key": key or f"note:{_clip(text)}", "text": _clip(text), "actor": actor, "at": at}
+    digest["topics"] = _push(digest["topics"], entry, "key", MAX_TOPICS)
+
+
+def _close_topic(digest: dict, key: str) -> None:
+    digest["topics"] = [topic for topic in digest["topics"] if topic.get("key") != key]
+
+
+def _add_decision(digest: dict, text: str, actor: str, at: str) -> None:
+    entry = {"text": _clip(text), "actor": actor, "at": at}
+    digest["decisions"] = _push(digest["decisions"], entry, "text", MAX_DECISIONS)
+
+
+def _touch_branch(digest: dict, branch: str, actor: str, at: str) -> None:
+    entry = {"name": branch, "actor": actor, "at": at}
+    digest["branches"] = _push(digest["branches"], entry, "name", MAX_BRANCHES)
+
+
+def _apply_github(digest: dict, payload: dict, at: str) -> None:
+    sender = (payload.get("sender") or {}).get("login") or "unknown"
+
+    # Branch created or deleted (only "create" events carry master_branch)
+    if payload.get("ref_type") == "branch" and payload.get("ref"):
+        if "master_branch" in payload:
+            _touch_branch(digest, payload["ref"], sender, at)
+        else:
+            digest["branches"] = [b for b in digest["branches"] if b.get("name") != payload["ref"]]
+        return
+
+    # Push: branch activity, who touched which paths, decisions in commit messages
+    if "commits" in payload and str(payload.get("ref", "")).startswith("refs/heads/"):
+        branch = payload["ref"][len("refs/heads/"):]
+        pusher = (payload.get("pusher") or {}).get("name") or sender
+        _touch_branch(digest, branch, pusher, at)
+
+        touched = 0
+        for commit in payload.get("commits") or []:
+            author = commit.get("author") or {}
+            actor = author.get("username") or author.get("name") or pusher
+            for path in (commit.get("added") or []) + (commit.get("modified") or []) + (commit.get("removed") or []):
+                if touched >= MAX_PATHS_PER_ACTIVITY:
+                    break
+                entry = {"path": path, "actor": actor, "branch": branch, "at": at}
+                digest["paths"] = _push(digest["paths"], entry, "path", MAX_PATHS)
+                touched += 1
+            message = (commit.get("message") or "").split("\n")[0]
+            if DECISION_PATTERN.search(message):
+                _add_decision(digest, message, actor, at)
+        return
+
+    # Pull requests and issues open or close topics
+    for kind, label in (("pull_request", "PR"), ("issue", "Issue")):
+        item = payload.get(kind)
+        if not isinstance(item, dict):
+            continue
+        key = f"{label}#{item.get('number')}"
+        if payload.get("action") in ("closed", "deleted"):
+            _close_topic(digest, key)
+        elif "comment" not in payload:
+            _add_topic(digest, key, f"{key}: {item.get('title', '')}", sender, at)
+        if kind == "pull_request" and (item.get("head") or {}).get("ref"):
+            _touch_branch(digest, item["head"]["ref"], sender, at)
+
+        comment = (payload.get("comment") or {}).get("body", "")
+        if comment and DECISION_PATTERN.search(comment):
+            _add_decision(digest, f"{key}: {comment}", sender, at)
+        return
+
+
+def _apply_message(digest: dict, payload: dict, at: str) -> None:
+    # Chat platforms: messages become topics, or decisions when they say so
+    text = payload.get("content") or payload.get("text") or ""
+    if not text:
+        return
+    author = payload.get("author") or payload.get("user") or {}
+    actor = (
+        author.get("username") or author.get("name") or "unknown"
+        if isinstance(author, dict) else str(author)
+    )
+    if DECISION_PATTERN.search(text):
+        _add_decision(digest, text, actor, at)
+    else:
+        _add_topic(digest, None, text, actor, at)
+
+
+def apply_activity(digest: dict, activity: dict) -> dict:
+    """
+    Folds one activity into a digest (deterministic, no I/O).
+
+    Args:
+        digest (dict): The current digest (not modified)
+        activity (dict): Activity row with 'platform', 'content', 'id' and 'created_at'
+
+    Returns:
+        dict: The updated digest
+    """
+    digest = copy.deepcopy(digest)
+    payload = activity.get("content")
+    at = str(activity.get("created_at") or datetime.utcnow().isoformat())
+
+    if isinstance(payload, dict):
+        if activity.get("platform") == "GitHub":
+            _apply_github(digest, payload, at)
+        else:
+            _apply_message(digest, payload, at)
+
+    if activity.get("id") is not None:
+        digest["recent_activity_ids"] = (
+            [activity["id"]] + digest["recent_activity_ids"]
+        )[:RECENT_ACTIVITY_IDS]
+
+    # Distinct recent activities by content; a repeated event doesn't shift
+    # them, so the verdict cache key stays stable under bot/CI repeats
+    fingerprint = activity_fingerprint(activity.get("platform", "Unknown"), payload)
+    digest["recent_fingerprints"] = [fingerprint] + [
+        existing for existing in digest.get("recent_fingerprints", []) if existing != fingerprint
+    ][: RECENT_ACTIVITY_IDS - 1]
+    digest["activity_count"] += 1
+    digest["since_summary"] += 1
+    return digest
+
+
+def render_digest(digest: dict) -> str:
+    """
+    Formats a digest as the context section of the conflict prompt.
+
+    Args:
+        digest (dict): The project digest
+
+    Returns:
+        str: A bounded-size text description of the project state
+    """
+    if not digest or not digest.get("activity_count"):
+        return "No recent activities found for this project."
+
+    lines = ["Current project state:"]
+    if digest.get("summary"):
+        lines.append(f"Summary: {digest['summary']}")
+
+    if digest["branches"]:
+        lines.append("Active branches: " + ", ".join(
+            f"{b['name']} ({b['actor']}, {b['at']})" for b in digest["branches"]
+        ))
+
+    if digest["paths"]:
+        by_actor = {}
+        for entry in digest["paths"]:
+            by_actor.setdefault(entry["actor"], []).append(f"{entry['path']} [{entry['branch']}]")
+        lines.append("Who is working where:")
+        lines.extend(f"- {actor}: {', '.join(paths)}" for actor, paths in by_actor.items())
+
+    if digest["topics"]:
+        lines.append("Open topics:")
+        lines.extend(f"- {t['text']} ({t['actor']}, {t['at']})" for t in digest["topics"])
+
+    if digest["decisions"]:
+        lines.append("Recent decisions:")
+        lines.extend(f"- {d['text']} ({d['actor']}, {d['at']})" for d in digest["decisions"])
+
+    return "\n".join(lines)
+
+
+def _project_lock(project_id: str) -> asyncio.Lock:
+    lock = _project_locks.get(project_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _project_locks[project_id] = lock
+    return lock
+
+
+def _load_digest(project_id: str) -> Tuple[Optional[dict], Optional[int]]:
+    # Returns (digest, version), or (None, None) if the project has no digest yet
+    supabase = get_supabase_client()
+    response = supabase.table("project_digests").select("digest, version").eq(
+        "project_id", int(project_id)
+    ).limit(1).execute()
+    if not response.data:
+        return None, None
+    return response.data[0]["digest"], response.data[0].get("version") or 0
+
+
+def _save_digest(project_id: str, digest: dict, version: Optional[int]) -> bool:
+    """
+    Saves a digest if nobody else saved one since it was read (compare-and-swap).
+
+    Args:
+        project_id (str): The project ID
+        digest (dict): The new digest
+        version (int): Version returned by _load_digest (None if there was no row)
+
+    Returns:
+        bool: False if another worker saved first; reload and retry
+    """
+    supabase = get_supabase_client()
+    updated_at = datetime.utcnow().isoformat()
+    if version is None:
+        try:
+            supabase.table("project_digests").insert({
+                "project_id": int(project_id),
+                "digest": digest,
+                "version": 1,
+                "updated_at": updated_at,
+            }).execute()
+        except Exception as e:
+            if is_unique_violation(e):  # Another worker created it meanwhile
+                return False
+            raise
+        return True
+
+    response = supabase.table("project_digests").update({
+        "digest": digest,
+        "version": version + 1,
+        "updated_at": updated_at,
+    }).eq("project_id", int(project_id)).eq("version", version).execute()
+    return bool(response.data)
+
+
+def _bootstrap_digest(project_id: str, exclude_ids: List) -> dict:
+    # Build a first digest from the project's latest stored activities
+    supabase = get_supabase_client()
+    response = supabase.table("activities").select("*").eq(
+        "project_id", project_id
+    ).order("created_at", desc=True).limit(BOOTSTRAP_ACTIVITIES).execute()
+
+    digest = empty_digest()
+    for activity in reversed(response.data or []):
+        if activity.get("id") not in exclude_ids:
+            digest = apply_activity(digest, activity)
+    return digest
+
+
+async def get_project_digest(project_id: str) -> dict:
+    """
+    Returns the current digest of a project.
+
+    Args:
+        project_id (str): The project ID
+
+    Returns:
+        dict: The stored digest, or one bootstrapped from recent activities
+    """
+    digest, _ = _load_digest(project_id)
+    if digest is None:
+        digest = _bootstrap_digest(project_id, [])
+    return digest
+
+
+async def update_project_digest(project_id: str, activities: List[dict]) -> Tuple[dict, dict]:
+    """
+    Folds newly stored activities into the project's digest and saves it.
+
+    Every DIGEST_RESUMMARIZE_EVERY activities a cheap background LLM call
+    refreshes the digest's short prose summary.
+
+    Args:
+        project_id (str): The project the activities belong to
+        activities (list): New activity rows, oldest first
+
+    Returns:
+        tuple: (digest before these activities, digest after them)
+
+    Raises:
+        Exception: If other workers kept winning the save DIGEST_SAVE_ATTEMPTS times
+    """
+    async with _project_lock(project_id):
+        for _ in range(DIGEST_SAVE_ATTEMPTS):
+            previous, version = _load_digest(project_id)
+            if previous is None:
+                previous = _bootstrap_digest(project_id, [a.get("id") for a in activities])
+
+            updated = previous
+            for activity in activities:
+                updated = apply_activity(updated, activity)
+
+            if _save_digest(project_id, updated, version):
+                break
+        else:
+            raise Exception(f"Digest of project {project_id} kept changing; update not saved")
+
+    if updated["since_summary"] >= DIGEST_RESUMMARIZE_EVERY and project_id not in _resummarizing:
+        _resummarizing.add(project_id)
+        spawn(resummarize_project_digest(project_id), name=f"digest-summary-{project_id}")
+
+    return previous, updated
+
+
+async def resummarize_project_digest(project_id: str) -> None:
+    """
+    Refreshes the prose summary of a project's digest with one short LLM call.
+
+    Runs in the background at background priority; the structured sections
+    are left as they are.
+
+    Args:
+        project_id (str): The project ID
+    """
+    try:
+        digest = await get_project_digest(project_id)
+        summary = await _summarize_digest(project_id, digest)
+
+        async with _project_lock(project_id):
+            for _ in range(DIGEST_SAVE_ATTEMPTS):
+                # Re-read: new activities may have landed while the model was
+                # running; they stay counted towards the next refresh
+                current, version = _load_digest(project_id)
+                if current is None:
+                    current = copy.deepcopy(digest)
+                current["summary"] = summary
+                current["since_summary"] = max(0, current["since_summary"] - digest["since_summary"])
+                if _save_digest(project_id, current, version):
+                    break
+            else:
+                print(f"Digest summary of project {project_id} not saved: digest kept changing")
+    finally:
+        _resummarizing.discard(project_id)
+
+
+async def _summarize_digest(project_id: str, digest: dict) -> str:
+    # Imported here so digest bookkeeping works without a Gemini API key
+    from app.services.ai_services import llm
+
+    messages = [
+        SystemMessage(content="""
+        You are a Project Manager keeping a running summary of a software project.
+        """),
+        HumanMessage(content=f"""
+        Summarize the state of this project in at most 3 short sentences: what is
+        being worked on, by whom, and what has been decided. Return only the summary.
+
+        {render_digest(digest)}
+        """),
+    ]
+    response = await get_llm_scheduler().run(
+        lambda: llm.ainvoke(messages),
+        priority=Priority.BACKGROUND,
+        tenant=str(project_id),
+        estimated_tokens=estimate_tokens(messages),
+    )
+    # Keep the summary bounded even if the model ignores the length request
+    return " ".join(str(response.content).split())[: 3 * MAX_TEXT_LENGTH]
@@ -0,0 +1,109 @@
+from typing import Dict, List
+from app.database import get_supabase_client
+
+
+def record_project_activity(project_id: str, platform: str, created_at: str) -> None:
+    """
+    Increments the dashboard counters of a project for one new activity.
+
+    Runs a single upsert on the database (see migrations/001_project_stats.sql),
+    so counters stay correct when several webhooks arrive concurrently.
+    Failures are logged and swallowed: counters must never break ingest.
+
+    Args:
+        project_id (str): The project the activity belongs to
+        platform (str): Source platform of the activity (e.g. "GitHub")
+        created_at (str): ISO timestamp of the activity
+    """
+    try:
+        supabase = get_supabase_client()
+        supabase.rpc("record_project_activity", {
+            "p_project_id": int(project_id),
+            "p_platform": platform,
+            "p_created_at": created_at,
+        }).execute()
+    except Exception as e:
+        print(f"Failed to update activity stats for project {project_id}: {str(e)}")
+
+
+def record_project_activities(
+    project_id: str,
+    platform_counts: Dict[str, int],
+    last_activity_at: str
+) -> None:
+    """
+    Adds a batch of new activities to a project's dashboard counters.
+
+    One round trip per project, however many activities the batch holds.
+
+    Args:
+        project_id (str): The project the activities belong to
+        platform_counts (dict): Number of new activities per platform
+        last_activity_at (str): ISO timestamp of the newest activity in the batch
+    """
+    try:
+        supabase = get_supabase_client()
+        supabase.rpc("record_project_activities", {
+            "p_project_id": int(project_id),
+            "p_platform_counts": platform_counts,
+            "p_last_activity_at": last_activity_at,
+        }).execute()
+    except Exception as e:
+        print(f"Failed to update activity stats for project {project_id}: {str(e)}")
+
+
+def record_project_conflict(project_id: str, delta: int = 1) -> None:
+    """
+    Adjusts the open-conflict counter of a project.
+
+    Args:
+        project_id (str): The project the conflict belongs to
+        delta (int): +1 for a newly detected conflict, -1 when one is closed
+    """
+    try:
+        supabase = get_supabase_client()
+        supabase.rpc("record_project_conflict", {
+            "p_project_id": int(project_id),
+            "p_delta": delta,
+        }).execute()
+    except Exception as e:
+        print(f"Failed to update conflict stats for project {project_id}: {str(e)}")
+
+
+def get_project_stats(project_ids: List) -> Dict[str, dict]:
+    """
+    Fetches the dashboard counters for a page of projects in one query.
+
+    Args:
+        project_ids (list): IDs of the projects on the current page
+
+    Returns:
+        dict: Project ID (as string) mapped to its counters; projects
+              without any activity yet get zeroed counters
+    """
+    stats = {
+        str(project_id): {
+            "activity_count": 0,
+            "platform_counts": {},
+            "open_conflict_count": 0,
+            "last_activity_at": None,
+        }
+        for project_id in project_ids
+    }
+    if not project_ids:
+        return stats
+
+    supabase = get_supabase_client()
+    response = supabase.table("project_stats").select(
+        "project_id, activity_count, platform_counts, open_conflict_count, last_activity_at"
+    ).in_("project_id", project_ids).execute()
+
+    for row in response.data or []:
+        stats[str(row["project_id"])] = {
+            "activity_count": row.get("activity_count", 0),
+            "platform_counts": row.get("platform_counts") or {},
+            "open_conflict_count": row.get("open_conflict_count", 0),
+            "last_activity_at": row.get("last_activity_at"),
+        }
+
+    return stats
@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import hashlib
+from typing import List, Optional
+from app.cache import Cache, MISSING, get_cache
+from app.services.conflict_radar import evaluate_conflict, PARSE_ERROR_VERDICT
+from app.services.fingerprints import (
+    minhash_signature,
+    minhash_bands,
+    estimate_similarity,
+)
+
+# How long an exact verdict is reused (seconds)
+VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", "3600"))
+
+# How long a verdict is reused for near-duplicate activities (seconds; opt-in,
+# 0 disables)
+VERDICT_NEAR_DUPLICATE_TTL = float(os.getenv("VERDICT_NEAR_DUPLICATE_TTL", "0"))
+
+# Minimum estimated Jaccard similarity for a near-duplicate match
+VERDICT_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("VERDICT_NEAR_DUPLICATE_THRESHOLD", "0.9"))
+
+# Verdict fields worth reusing (context IDs always come from the current digest)
+VERDICT_FIELDS = ("has_conflict", "verdict", "warning")
+
+
+class _Uncacheable(Exception):
+    # Carries a verdict out of the cache loader without storing it
+    def __init__(self, result: dict):
+        self.result = result
+
+
+def context_fingerprint(digest: dict) -> str:
+    """
+    Fingerprints the part of a digest a cached verdict depends on.
+
+    Args:
+        digest (dict): Project digest the activity is evaluated against
+
+    Returns:
+        str: Hex digest of the recent activity fingerprints and the summary
+    """
+    context = {
+        "recent": digest.get("recent_fingerprints", []),
+        "summary": digest.get("summary", ""),
+    }
+    return hashlib.sha256(json.dumps(context, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    Reuses Conflict Radar verdicts for activities that say the same thing.
+
+    Exact matches are keyed on the project, the canonical fingerprint of the
+    new activity and the fingerprints of its context; concurrent identical
+    events share one model call. Optionally (VERDICT_NEAR_DUPLICATE_TTL > 0),
+    an activity whose MinHash signature is close enough to a recently
+    evaluated one in the same project and context reuses its verdict for a
+    shorter TTL. Unparseable model answers are never cached.
+    """
+
+    # Weight of the newest model call in the average miss latency
+    LATENCY_SMOOTHING = 0.2
+
+    def __init__(
+        self,
+        cache: Optional[Cache] = None,
+        ttl: float = VERDICT_CACHE_TTL,
+        near_duplicate_ttl: float = VERDICT_NEAR_DUPLICATE_TTL,
+        near_duplicate_threshold: float = VERDICT_NEAR_DUPLICATE_THRESHOLD,
+    ):
+        self.cache = cache
+        self.ttl = ttl
+        self.near_duplicate_ttl = near_duplicate_ttl
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.average_miss_seconds = 0.0
+        self.latency_saved_seconds = 0.0
+
+    def _cache(self) -> Cache:
+        return self.cache if self.cache is not None else get_cache()
+
+    async def evaluate(
+        self,
+        activity_fingerprint: str,
+        activity_text: str,
+        normalized_text: str,
+        digest: dict,
+        project_id: str,
+    ) -> dict:
+        """
+        Returns the verdict for an activity, from cache when possible.
+
+        Args:
+            activity_fingerprint (str): Canonical fingerprint of the new activity
+            activity_text (str): Description of the activity sent to the model on a miss
+            normalized_text (str): Normalized activity text used for near-duplicate matching
+            digest (dict): Project digest from before the activity
+            project_id (str): The project ID
+
+        Returns:
+            dict: Same shape as evaluate_conflict's result
+        """
+        context = context_fingerprint(digest)
+        context_activity_ids = list(digest.get("recent_activity_ids", []))
+        key = "verdict:" + hashlib.sha256(
+            f"{project_id}:{activity_fingerprint}:{context}".encode("utf-8")
+        ).hexdigest()
+
+        cached = await self._cache().aget(key, MISSING)
+        if cached is not MISSING:
+            self._record_hit(exact=True)
+            return {**cached, "context_activity_ids": context_activity_ids}
+
+        signature = None
+        if self.near_duplicate_ttl > 0:
+            signature = minhash_signature(normalized_text)
+            near = await self._find_near_duplicate(project_id, context, signature)
+            if near is not None:
+                self._record_hit(exact=False)
+                return {**near, "context_activity_ids": context_activity_ids}
+
+        loaded = []
+
+        async def load() -> dict:
+            loaded.append(True)
+            started = time.monotonic()
+            result = await evaluate_conflict(activity_text, digest, project_id)
+            self._record_miss(time.monotonic() - started)
+            if result.get("verdict") == PARSE_ERROR_VERDICT:
+                raise _Uncacheable(result)
+            return {field: result.get(field) for field in VERDICT_FIELDS}
+
+        try:
+            verdict = await self._cache().get_or_set(key, load, ttl=self.ttl)
+        except _Uncacheable as e:
+            return e.result
+
+        if not loaded:
+            # Another caller's in-flight evaluation of the same activity answered
+            self._record_hit(exact=True)
+        elif signature is not None:
+            await self._store_near_duplicate(project_id, context, signature, verdict)
+
+        return {**verdict, "context_activity_ids": context_activity_ids}
+
+    def _near_keys(self, project_id: str, context: str, signature: List[int]) -> List[str]:
+        return [f"verdict:near:{project_id}:{context}:{band}" for band in minhash_bands(signature)]
+
+    async def _find_near_duplicate(
+        self, project_id: str, context: str, signature: List[int]
+    ) -> Optional[dict]:
+        for near_key in self._near_keys(project_id, context, signature):
+            candidate = await self._cache().aget(near_key)
+            if candidate and estimate_similarity(
+                signature, candidate["signature"]
+            ) >= self.near_duplicate_threshold:
+                return candidate["verdict"]
+        return None
+
+    async def _store_near_duplicate(
+        self, project_id: str, context: str, signature: List[int], verdict: dict
+    ) -> None:
+        entry = {"signature": signature, "verdict": verdict}
+        for near_key in self._near_keys(project_id, context, signature):
+            await self._cache().aset(near_key, entry, ttl=self.near_duplicate_ttl)
+
+    def _record_hit(self, exact: bool) -> None:
+        if exact:
+            self.exact_hits += 1
+        else:
+            self.near_hits += 1
+        self.latency_saved_seconds += self.average_miss_seconds
+
+    def _record_miss(self, seconds: float) -> None:
+        self.misses += 1
+        if self.average_miss_seconds:
+            self.average_miss_seconds += self.LATENCY_SMOOTHING * (seconds - self.average_miss_seconds)
+        else:
+            self.average_miss_seconds = seconds
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and estimated model time saved in this process."""
+        hits = self.exact_hits + self.near_hits
+        total = hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "near_duplicate_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "average_miss_ms": round(self.average_miss_seconds * 1000, 1),
+            "latency_saved_seconds": round(self.latency_saved_seconds, 2),
+            "near_duplicate_matching": self.near_duplicate_ttl > 0,
+        }
+
+
+# Process-wide verdict cache
+verdict_cache = VerdictCache()
+
+
+def get_verdict_cache() -> VerdictCache:
+    """
+    Returns the process-wide Conflict Radar verdict cache.
+
+    Returns:
+        VerdictCache: The verdict cache instance
+    """
+    return verdict_cache
@@ -0,0 +1,137 @@
+"""
+Benchmarks how fast each platform adapter decodes webhooks.
+
+Measures the per-request work an adapter adds in front of the shared ingest
+pipeline: JSON decoding, signature verification and normalization,
+on representative payloads. No database or model is involved.
+
+Usage (from the backend directory):
+    python -m app.tools.bench_adapters
+    python -m app.tools.bench_adapters --platform slack --iterations 50000
+"""
+import sys
+import hmac
+import json
+import time
+import hashlib
+import argparse
+from typing import Dict, List, Tuple
+from app.adapters import list_platforms, sha256_signature
+from app.adapters.discord import DiscordAdapter
+from app.adapters.github import GitHubAdapter
+from app.adapters.slack import SlackAdapter
+
+# Secret used to sign the sample requests
+BENCH_SIGNING_SECRET = "bench-signing-secret"
+
+
+def _github_sample() -> Tuple[bytes, Dict[str, str]]:
+    payload = {
+        "ref": "refs/heads/feature/login",
+        "repository": {"full_name": "synapsex/app", "id": 1},
+        "pusher": {"name": "octocat"},
+        "sender": {"login": "octocat"},
+        "commits": [
+            {
+                "id": f"{i:040x}",
+                "message": f"Update login flow step {i}",
+                "author": {"name": "Octo Cat", "username": "octocat"},
+                "added": [],
+                "modified": [f"src/auth/login_{i}.py", "src/auth/session.py"],
+                "removed": [],
+            }
+            for i in range(3)
+        ],
+    }
+    body = json.dumps(payload).encode()
+    return body, {
+        "x-github-delivery": "72d3162e-cc78-11e3-81ab-4c9367dc0958",
+        "x-hub-signature-256": sha256_signature(BENCH_SIGNING_SECRET, body),
+    }
+
+
+def _discord_sample() -> Tuple[bytes, Dict[str, str]]:
+    payload = {
+        "id": "1100000000000000000",
+        "guild_id": "900000000000000000",
+        "channel_id": "910000000000000000",
+        "author": {"id": "920000000000000000", "username": "alice"},
+        "content": "I'm refactoring the session middleware today, please hold off on auth changes",
+    }
+    body = json.dumps(payload).encode()
+    return body, {"x-signature-256": sha256_signature(BENCH_SIGNING_SECRET, body)}
+
+
+def _slack_sample() -> Tuple[bytes, Dict[str, str]]:
+    payload = {
+        "type": "event_callback",
+        "team_id": "T0001",
+        "event_id": "Ev0PV52K25",
+        "event": {
+            "type": "message",
+            "user": "U2147483697",
+            "channel": "C2147483705",
+            "text": "We decided to switch the API to cursor pagination",
+            "ts": "1355517523.000005",
+        },
+    }
+    body = json.dumps(payload).encode()
+    timestamp = str(int(time.time()))
+    signature = "v0=" + hmac.new(
+        BENCH_SIGNING_SECRET.encode(), b"v0:" + timestamp.encode() + b":" + body, hashlib.sha256
+    ).hexdigest()
+    return body, {"x-slack-request-timestamp": timestamp, "x-slack-signature": signature}
+
+
+SAMPLES = {
+    "github": _github_sample,
+    "discord": _discord_sample,
+    "slack": _slack_sample,
+}
+
+# Adapters configured with the benchmark secret
+ADAPTERS = {
+    "github": lambda: GitHubAdapter(webhook_secret=BENCH_SIGNING_SECRET),
+    "discord": lambda: DiscordAdapter(relay_secret=BENCH_SIGNING_SECRET),
+    "slack": lambda: SlackAdapter(signing_secret=BENCH_SIGNING_SECRET),
+}
+
+
+def bench_adapter(name: str, iterations: int) -> dict:
+    """Decodes the platform's sample request `iterations` times."""
+    adapter = ADAPTERS[name]()
+    body, headers = SAMPLES[name]()
+
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        adapter.verify(headers, body)
+        adapter.normalize(json.loads(body), headers)
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "platform": name,
+        "iterations": iterations,
+        "body_bytes": len(body),
+        "events_per_second": round(iterations / elapsed, 1) if elapsed else 0.0,
+        "microseconds_per_event": round(elapsed / iterations * 1e6, 2),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark webhook adapter decode throughput.")
+    parser.add_argument("--platform", action="append", help="Platform to benchmark (repeatable; default: all)")
+    parser.add_argument("--iterations", type=int, default=20000, help="Requests decoded per platform")
+    args = parser.parse_args(argv)
+
+    platforms: List[str] = args.platform or [name for name in list_platforms() if name in SAMPLES]
+    unknown = [name for name in platforms if name not in SAMPLES]
+    if unknown:
+        parser.error(f"No sample payload for {unknown}; available: {sorted(SAMPLES)}")
+
+    results = [bench_adapter(name, args.iterations) for name in platforms]
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
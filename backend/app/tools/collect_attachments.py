@@ -0,0 +1,37 @@
+"""
+Removes attachment bodies no project references any more.
+
+Detaching a file only decrements its object's ref_count; an object left
+unreferenced is marked released and kept for a grace period so an upload that
+just saw it can still attach to it. This tool deletes the objects released
+longer ago than that and removes their bodies from storage. Run it from cron.
+
+Usage (from the backend directory):
+    python -m app.tools.collect_attachments
+    python -m app.tools.collect_attachments --grace 86400
+"""
+import argparse
+from app.services.attachments import (
+    ATTACHMENT_COLLECT_GRACE_SECONDS,
+    collect_unreferenced_attachments,
+)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Delete attachment objects that have been unreferenced past the grace period."
+    )
+    parser.add_argument(
+        "--grace",
+        type=int,
+        default=ATTACHMENT_COLLECT_GRACE_SECONDS,
+        help="Seconds an unreferenced object is kept (default: ATTACHMENT_COLLECT_GRACE_SECONDS)",
+    )
+    args = parser.parse_args(argv)
+
+    removed = collect_unreferenced_attachments(args.grace)
+    print(f"Removed {removed} attachment object(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Probes that an enrichment job handed back on shutdown is resumed elsewhere.
+
+Plays the part of a draining worker (marks the project's job 'pending' with
+ai_updated_at = RELEASED_AT, exactly as a cancelled job does) and then of
+another worker: one enrichment sweep from this process must claim the job
+and run it to 'complete'. Runs the real model calls, so point it at a
+staging project.
+
+Usage (from the backend directory):
+    python -m app.tools.probe_enrichment_resume --project 12
+    python -m app.tools.probe_enrichment_resume --project 12 --timeout 300
+
+Exits with status 1 if the job isn't claimed or doesn't complete in time.
+"""
+import sys
+import json
+import asyncio
+import argparse
+from app.database import get_supabase_client
+from app.services.background import drain
+from app.services.enrichment import (
+    RELEASED_AT,
+    STATUS_COMPLETE,
+    STATUS_PENDING,
+    requeue_unfinished_enrichments,
+)
+
+
+def _read_status(project_id: int) -> dict:
+    response = get_supabase_client().table("projects").select(
+        "id, ai_status, ai_attempts, ai_error, ai_updated_at"
+    ).eq("id", project_id).limit(1).execute()
+    if not response.data:
+        raise ValueError(f"Project {project_id} not found")
+    return response.data[0]
+
+
+def _hand_back(project_id: int) -> None:
+    # What _run_enrichment writes when a draining worker cancels the job
+    get_supabase_client().table("projects").update({
+        "ai_status": STATUS_PENDING,
+        "ai_attempts": 0,
+        "ai_updated_at": RELEASED_AT,
+    }).eq("id", project_id).execute()
+
+
+async def probe(project_id: int, timeout: float) -> dict:
+    """Hands the job back, runs one sweep and waits for the job to finish."""
+    await asyncio.to_thread(_read_status, project_id)
+    await asyncio.to_thread(_hand_back, project_id)
+
+    restarted = await requeue_unfinished_enrichments()
+    still_running = await drain(timeout)
+    row = await asyncio.to_thread(_read_status, project_id)
+
+    return {
+        "project_id": project_id,
+        "restarted": restarted,
+        "still_running": still_running,
+        "status": row.get("ai_status"),
+        "attempts": row.get("ai_attempts"),
+        "error": row.get("ai_error"),
+        "ok": restarted > 0 and row.get("ai_status") == STATUS_COMPLETE,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Check that a handed-back enrichment job is resumed by another worker."
+    )
+    parser.add_argument("--project", type=int, required=True, help="Project whose job is handed back")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for the job")
+    args = parser.parse_args(argv)
+
+    try:
+        result = asyncio.run(probe(args.project, args.timeout))
+    except ValueError as e:
+        parser.error(str(e))
+
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    if not result["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Replays historical activities through the Conflict Radar.
+
+Streams each project's activities in time order, rebuilds the project's
+state digest as it goes, re-evaluates every activity against the digest
+as it was just before it (like the live webhook path), and writes a report
+of verdicts that differ from the stored ones. Use it after changing the
+conflict prompt or detection rules.
+
+Usage (from the backend directory):
+    python -m app.tools.replay_conflicts --project 12 --project 15
+    python -m app.tools.replay_conflicts --concurrency 8 --report diff.jsonl
+    python -m app.tools.replay_conflicts --dry-run --fake-latency-ms 50
+
+Progress is checkpointed per project, so an interrupted run resumes where
+it stopped when started again with the same --checkpoint file. The digest
+is fixed-size, so it is checkpointed too. Report lines written after the
+last checkpoint are not written again on resume (and a line cut off by the
+crash is dropped), so the report never holds duplicates. Periodic LLM re-summarization of
+the digest is not replayed. Dry runs use their own default checkpoint and
+report files, and a checkpoint is never resumed in the other mode.
+
+A project whose replay fails is recorded in the report as
+{"project_id": ..., "error": ...}; the other projects carry on, and the
+next run resumes the failed one from its last checkpoint.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Set, Tuple
+from app.database import get_supabase_client
+from app.services.conflict_radar import evaluate_conflict, summarize_activity_text
+from app.services.project_digest import apply_activity, empty_digest
+from app.services.llm_scheduler import LLMScheduler, get_llm_scheduler
+
+# Activities fetched per database round trip
+PAGE_SIZE = 200
+
+# Default progress and report files per mode, so dry runs never mix with real ones
+DEFAULT_PATHS = {
+    "live": ("replay_checkpoint.json", "replay_report.jsonl"),
+    "dry-run": ("replay_checkpoint.dry-run.json", "replay_report.dry-run.jsonl"),
+}
+
+
+class FakeConflictModel:
+    """
+    Stand-in for the Gemini model used by --dry-run.
+
+    Always answers "no conflict" after an optional simulated latency, so a
+    run measures the throughput of the pipeline itself (database paging,
+    prompt building, scheduling, parsing) without spending quota.
+    """
+
+    RESPONSE = json.dumps({"has_conflict": False, "verdict": "No conflict", "warning": ""})
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+
+    async def ainvoke(self, messages):
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return SimpleNamespace(content=self.RESPONSE, usage_metadata=None)
+
+
+class Checkpoint:
+    """
+    Per-project replay progress, persisted atomically as JSON.
+
+    Raises:
+        ValueError: If the file was written by a run in the other mode
+    """
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self.projects: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            saved_mode = saved.get("mode", "live")
+            if saved_mode != mode:
+                raise ValueError(
+                    f"Checkpoint {path} belongs to a {saved_mode} run; "
+                    f"refusing to resume it as a {mode} run"
+                )
+            self.projects = saved.get("projects", {})
+
+    def get(self, project_id: str) -> dict:
+        return self.projects.get(project_id, {})
+
+    def update(self, project_id: str, **fields) -> None:
+        self.projects.setdefault(project_id, {}).update(fields)
+        self.save()
+
+    def save(self) -> None:
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump({"mode": self.mode, "projects": self.projects}, f)
+        os.replace(temporary_path, self.path)
+
+
+class ReplayStats:
+    """Counters for the final summary."""
+
+    def __init__(self):
+        self.projects = 0
+        self.activities = 0
+        self.changed = 0
+        self.new_conflicts = 0
+        self.cleared_conflicts = 0
+        self.no_baseline = 0
+        self.failed_projects = 0
+        self.started_at = time.monotonic()
+
+    def summary(self) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "projects": self.projects,
+            "activities": self.activities,
+            "changed": self.changed,
+            "new_conflicts": self.new_conflicts,
+            "cleared_conflicts": self.cleared_conflicts,
+            "no_baseline": self.no_baseline,
+            "failed_projects": self.failed_projects,
+            "elapsed_seconds": round(elapsed, 2),
+            "activities_per_second": round(self.activities / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+def load_reported(path: str) -> Set[Tuple[str, str]]:
+    """
+    Reads the activities already in a report that is being resumed.
+
+    A trailing line without a newline was cut off by a crash and is
+    truncated away, so appending starts on a clean line.
+
+    Args:
+        path: The report file
+
+    Returns:
+        set: (project_id, activity_id) pairs, both as strings
+    """
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, "rb+") as f:
+        content = f.read()
+        complete = content.rfind(b"\n") + 1
+        if complete < len(content):
+            f.truncate(complete)
+
+    reported = set()
+    for line in content[:complete].splitlines():
+        entry = json.loads(line)
+        if entry.get("activity_id") is not None:
+            reported.add((str(entry["project_id"]), str(entry["activity_id"])))
+    return reported
+
+
+def _after_filter(position: dict) -> str:
+    # Keyset condition "(created_at, id) > position" in PostgREST syntax
+    created_at, activity_id = position["created_at"], position["id"]
+    return f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{activity_id})'
+
+
+def fetch_page(project_id: str, position: Optional[dict]) -> List[dict]:
+    """Fetches the next page of a project's activities in time order."""
+    query = get_supabase_client().table("activities").select("*").eq("project_id", project_id)
+    if position:
+        query = query.or_(_after_filter(position))
+    response = query.order("created_at").order("id").limit(PAGE_SIZE).execute()
+    return response.data or []
+
+
+def fetch_baseline(activity_ids: List) -> Dict:
+    """Fetches the stored verdicts for a page of activities (latest per activity)."""
+    if not activity_ids:
+        return {}
+    response = get_supabase_client().table("conflict_alerts").select(
+        "id, activity_id, has_conflict, verdict"
+    ).in_("activity_id", activity_ids).order("id").execute()
+    return {row["activity_id"]: row for row in response.data or []}
+
+
+def list_project_ids() -> List[str]:
+    """Returns the IDs of every project."""
+    response = get_supabase_client().table("projects").select("id").order("id").execute()
+    return [str(row["id"]) for row in response.data or []]
+
+
+async def replay_project(
+    project_id: str,
+    checkpoint: Checkpoint,
+    stats: ReplayStats,
+    report,
+    model,
+    scheduler: LLMScheduler,
+    include_unchanged: bool,
+    reported: Set[Tuple[str, str]],
+) -> None:
+    """Replays one project's history in time order."""
+    progress = checkpoint.get(project_id)
+    if progress.get("done"):
+        return
+
+    position = progress.get("position")
+    processed = progress.get("processed", 0)
+    digest = progress.get("digest") or empty_digest()
+
+    while True:
+        page = await asyncio.to_thread(fetch_page, project_id, position)
+        if not page:
+            break
+
+        baseline = await asyncio.to_thread(fetch_baseline, [a.get("id") for a in page])
+
+        for activity in page:
+            # Like the live path: evaluate against the state before the activity
+            result = await evaluate_conflict(
+                summarize_activity_text(activity.get("platform", "Unknown"), activity.get("content")),
+                digest,
+                project_id,
+                model=model,
+                scheduler=scheduler,
+            )
+            digest = apply_activity(digest, activity)
+
+            previous = baseline.get(activity.get("id"))
+            new_conflict = bool(result.get("has_conflict"))
+            old_conflict = bool(previous.get("has_conflict")) if previous else None
+            changed = previous is not None and old_conflict != new_conflict
+
+            stats.activities += 1
+            if previous is None:
+                stats.no_baseline += 1
+            elif changed:
+                stats.changed += 1
+                if new_conflict:
+                    stats.new_conflicts += 1
+                else:
+                    stats.cleared_conflicts += 1
+
+            # Lines written after the last checkpoint survive in the report
+            already_reported = (project_id, str(activity.get("id"))) in reported
+            if (changed or include_unchanged) and not already_reported:
+                report.write(json.dumps({
+                    "project_id": project_id,
+                    "activity_id": activity.get("id"),
+                    "created_at": activity.get("created_at"),
+                    "changed": changed,
+                    "old": {
+                        "has_conflict": old_conflict,
+                        "verdict": previous.get("verdict"),
+                    } if previous else None,
+                    "new": {
+                        "has_conflict": new_conflict,
+                        "verdict": result.get("verdict"),
+                        "warning": result.get("warning", ""),
+                    },
+                }) + "\n")
+
+        processed += len(page)
+        last = page[-1]
+        position = {"created_at": last["created_at"], "id": last["id"]}
+        report.flush()
+        checkpoint.update(project_id, position=position, processed=processed, digest=digest)
+
+    checkpoint.update(project_id, done=True, processed=processed)
+    stats.projects += 1
+
+
+async def run(args) -> dict:
+    checkpoint = Checkpoint(args.checkpoint, "dry-run" if args.dry_run else "live")
+    stats = ReplayStats()
+
+    if args.dry_run:
+        model = FakeConflictModel(latency_seconds=args.fake_latency_ms / 1000)
+        # No quota to protect: only the concurrency limit applies
+        scheduler = LLMScheduler(
+            requests_per_minute=10**9,
+            tokens_per_minute=10**12,
+            max_concurrency=args.concurrency,
+        )
+    else:
+        # Imported here so dry runs work without a Gemini API key
+        from app.services.conflict_radar import get_conflict_llm
+        model = get_conflict_llm()
+        scheduler = get_llm_scheduler()
+
+    project_ids = args.project or await asyncio.to_thread(list_project_ids)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    # Append when resuming so earlier results stay in the report
+    mode = "a" if checkpoint.projects else "w"
+    reported = load_reported(args.report) if mode == "a" else set()
+    with open(args.report, mode) as report:
+
+        async def limited(project_id: str) -> None:
+            async with semaphore:
+                try:
+                    await replay_project(
+                        project_id, checkpoint, stats, report, model, scheduler, args.all, reported
+                    )
+                except Exception as e:
+                    stats.failed_projects += 1
+                    print(f"Replay failed for project {project_id}: {str(e)}", file=sys.stderr)
+                    report.write(json.dumps({"project_id": project_id, "error": str(e)}) + "\n")
+                    report.flush()
+
+        await asyncio.gather(*(limited(project_id) for project_id in project_ids))
+
+    return stats.summary()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay historical activities through the Conflict Radar and report verdict changes."
+    )
+    parser.add_argument("--project", action="append", help="Project ID to replay (repeatable; default: all)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Projects replayed in parallel")
+    parser.add_argument(
+        "--checkpoint",
+        help="Progress file used to resume (default: replay_checkpoint.json, or replay_checkpoint.dry-run.json)",
+    )
+    parser.add_argument(
+        "--report",
+        help="Verdict diff report, JSON lines (default: replay_report.jsonl, or replay_report.dry-run.jsonl)",
+    )
+    parser.add_argument("--all", action="store_true", help="Also report activities whose verdict did not change")
+    parser.add_argument("--dry-run", action="store_true", help="Use a fake model instead of Gemini")
+    parser.add_argument("--fake-latency-ms", type=float, default=0.0, help="Simulated model latency in --dry-run")
+    args = parser.parse_args(argv)
+
+    default_checkpoint, default_report = DEFAULT_PATHS["dry-run" if args.dry_run else "live"]
+    args.checkpoint = args.checkpoint or default_checkpoint
+    args.report = args.report or default_report
+
+    try:
+        summary = asyncio.run(run(args))
+    except ValueError as e:
+        parser.error(str(e))
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+-- Per-project activity counters for the dashboard (GET /projects).
+--
+-- Maintained incrementally by record_project_activity() and
+-- record_project_conflict() on every webhook ingest, so listing projects
+-- never has to scan the activities table.
+
+create table if not exists project_stats (
+    project_id bigint primary key references projects(id) on delete cascade,
+    activity_count bigint not null default 0,
+    platform_counts jsonb not null default '{}'::jsonb,
+    open_conflict_count bigint not null default 0,
+    last_activity_at timestamptz,
+    updated_at timestamptz not null default now()
+);
+
+create or replace function record_project_activity(
+    p_project_id bigint,
+    p_platform text,
+    p_created_at timestamptz
+)
+returns void
+language sql
+as $$
+    insert into project_stats as s (
+        project_id, activity_count, platform_counts, last_activity_at
+    )
+    values (
+        p_project_id,
+        1,
+        jsonb_build_object(p_platform, 1),
+        p_created_at
+    )
+    on conflict (project_id) do update set
+        activity_count = s.activity_count + 1,
+        platform_counts = s.platform_counts || jsonb_build_object(
+            p_platform, coalesce((s.platform_counts ->> p_platform)::bigint, 0) + 1
+        ),
+        last_activity_at = greatest(s.last_activity_at, excluded.last_activity_at),
+        updated_at = now();
+$$;
+
+create or replace function record_project_conflict(
+    p_project_id bigint,
+    p_delta integer default 1
+)
+returns void
+language sql
+as $$
+    insert into project_stats as s (project_id, open_conflict_count)
+    values (p_project_id, greatest(p_delta, 0))
+    on conflict (project_id) do update set
+        open_conflict_count = greatest(s.open_conflict_count + p_delta, 0),
+        updated_at = now();
+$$;
+
+-- One-time backfill from existing activities
+insert into project_stats (project_id, activity_count, platform_counts, last_activity_at)
+select
+    per_platform.project_id,
+    sum(per_platform.n),
+    jsonb_object_agg(per_platform.platform, per_platform.n),
+    max(per_platform.last_at)
+from (
+    select a.project_id::bigint as project_id, a.platform, count(*) as n, max(a.created_at) as last_at
+    from activities a
+    join projects p on p.id = a.project_id::bigint
+    group by a.project_id, a.platform
+) per_platform
+group by per_platform.project_id
+on conflict (project_id) do nothing;
+
+create index if not exists projects_user_id_id_idx on projects (user_id, id desc);
@@ -0,0 +1,28 @@
+-- Conflict Radar verdicts, one row per analyzed activity.
+--
+-- Backs the GET /alerts feed. Feed queries are keyset-paginated on id within
+-- the user's projects, so they are served straight from the partial indexes.
+
+create table if not exists conflict_alerts (
+    id bigserial primary key,
+    project_id bigint not null references projects(id) on delete cascade,
+    activity_id bigint,
+    related_activity_ids bigint[] not null default '{}',
+    platform text,
+    has_conflict boolean not null default false,
+    verdict text,
+    warning text,
+    created_at timestamptz not null default now(),
+    read_at timestamptz
+);
+
+create index if not exists conflict_alerts_feed_idx
+    on conflict_alerts (project_id, id desc)
+    where has_conflict;
+
+create index if not exists conflict_alerts_unread_idx
+    on conflict_alerts (project_id, id desc)
+    where has_conflict and read_at is null;
+
+create index if not exists conflict_alerts_activity_idx
+    on conflict_alerts (activity_id);
@@ -0,0 +1,35 @@
+-- Batch variant of record_project_activity() for POST /webhooks/batch.
+--
+-- Adds a whole batch of a project's activities to its counters in one
+-- statement; p_platform_counts maps platform name to number of activities.
+
+create or replace function record_project_activities(
+    p_project_id bigint,
+    p_platform_counts jsonb,
+    p_last_activity_at timestamptz
+)
+returns void
+language sql
+as $$
+    insert into project_stats as s (
+        project_id, activity_count, platform_counts, last_activity_at
+    )
+    values (
+        p_project_id,
+        (select coalesce(sum(value::bigint), 0) from jsonb_each_text(p_platform_counts)),
+        p_platform_counts,
+        p_last_activity_at
+    )
+    on conflict (project_id) do update set
+        activity_count = s.activity_count + excluded.activity_count,
+        platform_counts = (
+            select jsonb_object_agg(
+                key,
+                coalesce((s.platform_counts ->> key)::bigint, 0)
+                    + coalesce((p_platform_counts ->> key)::bigint, 0)
+            )
+            from jsonb_object_keys(s.platform_counts || p_platform_counts) as key
+        ),
+        last_activity_at = greatest(s.last_activity_at, excluded.last_activity_at),
+        updated_at = now();
+$$;
@@ -0,0 +1,11 @@
+-- Rolling per-project state digest used as Conflict Radar context.
+--
+-- One fixed-size JSON document per project (active branches, who works on
+-- which paths, open topics, recent decisions, short summary), updated
+-- incrementally on every ingested activity.
+
+create table if not exists project_digests (
+    project_id bigint primary key references projects(id) on delete cascade,
+    digest jsonb not null,
+    updated_at timestamptz not null default now()
+);
@@ -0,0 +1,64 @@
+-- Content-addressed attachment storage.
+--
+-- Each distinct file body is stored once in the project-files bucket under
+-- objects/<sha256[:2]>/<sha256>. attachment_objects tracks how many
+-- (project, filename) references point at it; project_attachments holds
+-- those references. attach_project_file() records a reference and appends
+-- it to projects.attachments in one transaction, so retries and
+-- concurrent uploads never duplicate or drop list entries.
+
+create table if not exists attachment_objects (
+    sha256 text primary key,
+    storage_path text not null,
+    size bigint not null,
+    content_type text,
+    ref_count bigint not null default 0,
+    created_at timestamptz not null default now()
+);
+
+create table if not exists project_attachments (
+    project_id bigint not null references projects(id) on delete cascade,
+    sha256 text not null references attachment_objects(sha256),
+    filename text not null,
+    created_at timestamptz not null default now(),
+    primary key (project_id, sha256, filename)
+);
+
+create or replace function attach_project_file(
+    p_project_id bigint,
+    p_sha256 text,
+    p_storage_path text,
+    p_size bigint,
+    p_content_type text,
+    p_filename text,
+    p_attachment jsonb
+)
+returns boolean
+language plpgsql
+as $$
+declare
+    v_inserted integer;
+begin
+    insert into attachment_objects (sha256, storage_path, size, content_type)
+    values (p_sha256, p_storage_path, p_size, p_content_type)
+    on conflict (sha256) do nothing;
+
+    insert into project_attachments (project_id, sha256, filename)
+    values (p_project_id, p_sha256, p_filename)
+    on conflict do nothing;
+    get diagnostics v_inserted = row_count;
+
+    -- Same file under the same name already attached: metadata-only no-op
+    if v_inserted = 0 then
+        return false;
+    end if;
+
+    update attachment_objects set ref_count = ref_count + 1 where sha256 = p_sha256;
+
+    update projects
+    set attachments = coalesce(attachments, '[]'::jsonb) || jsonb_build_array(p_attachment)
+    where id = p_project_id;
+
+    return true;
+end;
+$$;
@@ -0,0 +1,18 @@
+-- Background AI enrichment state for projects.
+--
+-- Projects created with background enrichment are inserted with
+-- ai_status = 'pending'; a background job fills in ai_summary and tasks and
+-- moves the status through 'running' to 'complete' or, once its retries are
+-- exhausted, 'failed'. Existing and synchronously enriched projects are
+-- 'complete'.
+
+alter table projects
+    add column if not exists ai_status text not null default 'complete',
+    add column if not exists ai_attempts integer not null default 0,
+    add column if not exists ai_error text,
+    add column if not exists ai_updated_at timestamptz not null default now();
+
+-- Unfinished jobs picked up again when a worker starts
+create index if not exists projects_ai_unfinished_idx
+    on projects (ai_updated_at)
+    where ai_status in ('pending', 'running');
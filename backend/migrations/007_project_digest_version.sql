@@ -0,0 +1,8 @@
+-- Optimistic concurrency for project digests.
+--
+-- Every save bumps version and only applies if the row still has the
+-- version that was read, so workers updating the same project's digest
+-- concurrently retry instead of overwriting each other's activities.
+
+alter table project_digests
+    add column if not exists version bigint not null default 0;
@@ -0,0 +1,165 @@
+-- Attachment deduplication scoped to the owner, plus detaching.
+--
+-- Objects are now keyed on (owner_id, sha256) and stored under
+-- <owner_id>/objects/<sha256[:2]>/<sha256>, so one user's uploads never
+-- reveal (or share storage with) another user's files. detach_project_file()
+-- removes a reference and decrements ref_count; an object left with no
+-- references is marked released, and collect_attachment_objects() deletes
+-- rows released longer ago than a grace period, returning their storage
+-- paths for the caller to remove from the bucket.
+
+alter table project_attachments drop constraint if exists project_attachments_sha256_fkey;
+alter table attachment_objects drop constraint if exists attachment_objects_pkey;
+
+alter table attachment_objects
+    add column if not exists owner_id text,
+    add column if not exists released_at timestamptz;
+alter table project_attachments add column if not exists owner_id text;
+
+update project_attachments pa
+set owner_id = p.user_id::text
+from projects p
+where p.id = pa.project_id and pa.owner_id is null;
+
+-- Split pre-existing global objects into one row per owner; the body stays
+-- at its old path until every owner's row is collected
+insert into attachment_objects (owner_id, sha256, storage_path, size, content_type, ref_count, created_at)
+select pa.owner_id, o.sha256, o.storage_path, o.size, o.content_type, count(*), min(pa.created_at)
+from project_attachments pa
+join attachment_objects o on o.sha256 = pa.sha256 and o.owner_id is null
+group by pa.owner_id, o.sha256, o.storage_path, o.size, o.content_type;
+
+-- Global rows nobody references any more are released for collection
+update attachment_objects o
+set owner_id = '', ref_count = 0, released_at = now()
+where o.owner_id is null
+  and not exists (select 1 from project_attachments pa where pa.sha256 = o.sha256 and pa.owner_id is not null);
+delete from attachment_objects where owner_id is null;
+
+alter table attachment_objects alter column owner_id set not null;
+alter table attachment_objects add primary key (owner_id, sha256);
+alter table project_attachments alter column owner_id set not null;
+alter table project_attachments
+    add constraint project_attachments_object_fkey
+    foreign key (owner_id, sha256) references attachment_objects (owner_id, sha256);
+
+create index if not exists attachment_objects_released_idx
+    on attachment_objects (released_at)
+    where ref_count = 0;
+
+drop function if exists attach_project_file(bigint, text, text, bigint, text, text, jsonb);
+
+create or replace function attach_project_file(
+    p_owner_id text,
+    p_project_id bigint,
+    p_sha256 text,
+    p_storage_path text,
+    p_size bigint,
+    p_content_type text,
+    p_filename text,
+    p_attachment jsonb,
+    p_uploaded boolean
+)
+returns boolean
+language plpgsql
+as $$
+declare
+    v_inserted integer;
+begin
+    if p_uploaded then
+        insert into attachment_objects (owner_id, sha256, storage_path, size, content_type)
+        values (p_owner_id, p_sha256, p_storage_path, p_size, p_content_type)
+        on conflict (owner_id, sha256) do nothing;
+    end if;
+
+    -- Locks the object against collection until this transaction ends
+    perform 1 from attachment_objects
+    where owner_id = p_owner_id and sha256 = p_sha256
+    for update;
+    if not found then
+        -- Collected after the caller saw it: the caller uploads again
+        raise exception 'attachment object % no longer exists', p_sha256
+            using errcode = 'P0002';
+    end if;
+
+    insert into project_attachments (project_id, owner_id, sha256, filename)
+    values (p_project_id, p_owner_id, p_sha256, p_filename)
+    on conflict do nothing;
+    get diagnostics v_inserted = row_count;
+
+    -- Same file under the same name already attached: metadata-only no-op
+    if v_inserted = 0 then
+        return false;
+    end if;
+
+    update attachment_objects
+    set ref_count = ref_count + 1, released_at = null
+    where owner_id = p_owner_id and sha256 = p_sha256;
+
+    update projects
+    set attachments = coalesce(attachments, '[]'::jsonb) || jsonb_build_array(p_attachment)
+    where id = p_project_id;
+
+    return true;
+end;
+$$;
+
+create or replace function detach_project_file(
+    p_owner_id text,
+    p_project_id bigint,
+    p_sha256 text,
+    p_filename text
+)
+returns boolean
+language plpgsql
+as $$
+declare
+    v_deleted integer;
+begin
+    delete from project_attachments
+    where project_id = p_project_id and owner_id = p_owner_id
+      and sha256 = p_sha256 and filename = p_filename;
+    get diagnostics v_deleted = row_count;
+
+    if v_deleted = 0 then
+        return false;
+    end if;
+
+    update attachment_objects
+    set ref_count = greatest(ref_count - 1, 0),
+        released_at = case when ref_count <= 1 then now() else released_at end
+    where owner_id = p_owner_id and sha256 = p_sha256;
+
+    update projects
+    set attachments = (
+        select coalesce(jsonb_agg(entry), '[]'::jsonb)
+        from jsonb_array_elements(coalesce(attachments, '[]'::jsonb)) entry
+        where not (entry->>'sha256' = p_sha256 and entry->>'filename' = p_filename)
+    )
+    where id = p_project_id;
+
+    return true;
+end;
+$$;
+
+-- Deletes objects unreferenced for longer than the grace period and returns
+-- the storage paths no remaining row uses
+create or replace function collect_attachment_objects(p_grace_seconds integer)
+returns setof text
+language sql
+as $$
+    with collected as (
+        delete from attachment_objects
+        where ref_count = 0
+          and released_at < now() - make_interval(secs => p_grace_seconds)
+        returning storage_path
+    )
+    select distinct c.storage_path
+    from collected c
+    where not exists (
+        -- Rows kept by this statement (it doesn't see its own deletes)
+        select 1 from attachment_objects o
+        where o.storage_path = c.storage_path
+          and not (o.ref_count = 0 and o.released_at < now() - make_interval(secs => p_grace_seconds))
+    );
+$$;
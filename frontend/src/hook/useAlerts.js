@@ -47,16 +47,16 @@ export const fetchProjectTimeline = async (projectId) => {
 }
 
 /**
- * Fetch all alerts/activities for the current user
+ * Fetch conflict alerts across all of the current user's projects
  * 
- * @returns {Promise<Array>} - Array of all activities
+ * @param {string} [cursor] - Cursor from a previous page's `next_cursor`
+ * @returns {Promise<Object>} - { alerts, next_cursor, unread_count }
  */
-export const fetchAllAlerts = async () => {
+export const fetchAllAlerts = async (cursor) => {
   try {
-    // This would call your backend endpoint that returns all activities
-    // Adjust the endpoint based on your API structure
-    const activities = await apiGet('/activities')
-    return activities
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''
+    const page = await apiGet(`/alerts${query}`)
+    return page
   } catch (error) {
     console.error('Failed to fetch alerts:', error)
     